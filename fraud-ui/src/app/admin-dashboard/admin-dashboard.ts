@@ -1,8 +1,10 @@
 import { Component, OnInit, ChangeDetectorRef, ViewChildren, QueryList, ElementRef } from '@angular/core';
 import { CommonModule } from '@angular/common';
 import { FormsModule } from '@angular/forms';
-import { HttpClient, HttpClientModule } from '@angular/common/http';
+import { HttpClient, HttpClientModule, HttpParams } from '@angular/common/http';
 import { Chart } from 'chart.js/auto';
+import { EMPTY } from 'rxjs';
+import { expand, finalize, reduce } from 'rxjs/operators';
 
 // PrimeNG
 import { TableModule } from 'primeng/table';
@@ -10,6 +12,16 @@ import { PaginatorModule } from 'primeng/paginator';
 import { ButtonModule } from 'primeng/button';
 import { environment } from '../../environments/environment';
 
+interface RecordsPage {
+  next: string | null;
+  previous: string | null;
+  results: any[];
+}
+
+// Records fetched per "Load more" click, and per request while exporting
+const RECORDS_PAGE_SIZE = 100;
+const EXPORT_PAGE_SIZE = 1000;
+
 @Component({
   selector: 'app-admin-dashboard',
   standalone: true,
@@ -34,7 +46,18 @@ export class AdminDashboard implements OnInit {
   merchantChart: Chart | null = null;
 
   selectedFraudType: string = '';
+  selectedMerchant: string = '';
+  selectedStatus: string = 'true';
+  dateFrom: string = '';
+  dateTo: string = '';
   rows = 10;
+  pageSize = RECORDS_PAGE_SIZE;
+  nextRecordsUrl: string | null = null;
+  loadingRecords = false;
+  exporting = false;
+
+  // Bumped on every reload so pages of an older load are dropped
+  private recordsLoad = 0;
 
   private baseUrl = environment.apiUrl;   
 
@@ -67,22 +90,60 @@ export class AdminDashboard implements OnInit {
   }
 
   loadFraudulentRecords() {
-    this.http.get<any[]>(`${this.baseUrl}/admin-dashboard/fraudulent-records/`)
+    // Filters are applied by the API; only the first page is loaded, more on demand
+    const load = ++this.recordsLoad;
+    this.fraudulentRecords = [];
+    this.filteredRecords = [];
+    this.nextRecordsUrl = null;
+    this.loadRecordsPage(`${this.baseUrl}/admin-dashboard/fraudulent-records/`, this.recordsParams(), load);
+  }
+
+  loadMoreRecords() {
+    if (this.nextRecordsUrl) this.loadRecordsPage(this.nextRecordsUrl, undefined, this.recordsLoad);
+  }
+
+  private recordsParams(): HttpParams {
+    let params = new HttpParams().set('status', this.selectedStatus).set('limit', String(this.pageSize));
+    if (this.selectedFraudType) params = params.set('fraud_type', this.selectedFraudType);
+    if (this.selectedMerchant) params = params.set('merchant', this.selectedMerchant);
+    if (this.dateFrom) params = params.set('date_from', this.dateFrom);
+    if (this.dateTo) params = params.set('date_to', this.dateTo);
+    return params;
+  }
+
+  private loadRecordsPage(url: string, params: HttpParams | undefined, load: number) {
+    this.loadingRecords = true;
+    this.http.get<RecordsPage>(url, { params })
+      .pipe(finalize(() => { if (load === this.recordsLoad) this.loadingRecords = false; }))
       .subscribe(res => {
-        this.fraudulentRecords = res;
-        this.filteredRecords = [...this.fraudulentRecords];
+        if (load !== this.recordsLoad) return;
+        this.fraudulentRecords = [...this.fraudulentRecords, ...res.results];
+        this.filteredRecords = this.fraudulentRecords;
+        // `next` already carries the filters and the cursor
+        this.nextRecordsUrl = res.next;
       });
   }
 
   applyFilter() {
-    this.filteredRecords = this.selectedFraudType
-      ? this.fraudulentRecords.filter(r => r.fraud_type === this.selectedFraudType)
-      : [...this.fraudulentRecords];
+    this.loadFraudulentRecords();
   }
 
   exportCSV() {
+    // The export covers every filtered record, so it walks all pages on its own
+    const params = this.recordsParams().set('limit', String(EXPORT_PAGE_SIZE));
+    this.exporting = true;
+    this.http.get<RecordsPage>(`${this.baseUrl}/admin-dashboard/fraudulent-records/`, { params })
+      .pipe(
+        expand(res => res.next ? this.http.get<RecordsPage>(res.next) : EMPTY),
+        reduce((records: any[], res: RecordsPage) => records.concat(res.results), []),
+        finalize(() => (this.exporting = false))
+      )
+      .subscribe(records => this.downloadCSV(records));
+  }
+
+  private downloadCSV(records: any[]) {
     const header = ['Transaction ID', 'Merchant', 'Fraud Type', 'Text', 'Status'];
-    const rows = this.filteredRecords.map(r => [
+    const rows = records.map(r => [
       r.transaction_id,
       r.merchant_name,
       r.fraud_type,
@@ -90,12 +151,11 @@ export class AdminDashboard implements OnInit {
       r.status ? 'FRAUD' : 'REAL'
     ]);
 
-    const csvContent = 'data:text/csv;charset=utf-8,'
-      + header.join(',') + '\n'
+    const csvContent = header.join(',') + '\n'
       + rows.map(e => e.map(v => `"${v}"`).join(',')).join('\n');
 
     const link = document.createElement('a');
-    link.setAttribute('href', encodeURI(csvContent));
+    link.setAttribute('href', URL.createObjectURL(new Blob([csvContent], { type: 'text/csv;charset=utf-8' })));
     link.setAttribute('download', 'fraudulent_records.csv');
     document.body.appendChild(link);
     link.click();
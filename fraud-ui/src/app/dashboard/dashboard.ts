@@ -5,8 +5,8 @@ import Chart from 'chart.js/auto';
 import { FraudDetection } from '../fraud-detection';
 import { TableModule } from 'primeng/table';
 import { TagModule } from 'primeng/tag';
-import { of, Subject, fromEvent } from 'rxjs';
-import { catchError, debounceTime, finalize, switchMap, takeUntil, tap } from 'rxjs/operators';
+import { EMPTY, of, Subject, fromEvent } from 'rxjs';
+import { catchError, debounceTime, expand, finalize, reduce, switchMap, takeUntil, tap } from 'rxjs/operators';
 
 export type FraudType = 'fake_review' | 'payment' | 'chargeback' | 'merchant';
 
@@ -24,8 +24,12 @@ export interface Summary {
   total_non_fraud: number;
   fraud_percentage: number;
   transactions: Transaction[];
+  next_cursor?: number | null;
 }
 
+// Transactions per temp-summary page (the server's maximum)
+const SUMMARY_PAGE_SIZE = 5000;
+
 export interface CategoryBucket {
   captured_text: string;
   fraud: number;
@@ -137,7 +141,7 @@ export class Dashboard implements OnInit, OnDestroy {
     of(null)
       .pipe(
         switchMap(() => this.fraudService.uploadFile(this.fraudType, this.username, this.file!)),
-        switchMap(() => this.fraudService.getSummary()),
+        switchMap(() => this.loadSummary()),
         tap((res: Summary) => {
           // Hide pre-detection donut safely
           if (this.merchantDonutChart) { this.merchantDonutChart.destroy(); this.merchantDonutChart = null; }
@@ -166,6 +170,20 @@ export class Dashboard implements OnInit, OnDestroy {
       .subscribe();
   }
 
+  /** Summary with every transaction of the session, following next_cursor page by page */
+  private loadSummary() {
+    return this.fraudService.getSummary(undefined, SUMMARY_PAGE_SIZE).pipe(
+      expand((page: Summary) =>
+        page.next_cursor != null ? this.fraudService.getSummary(page.next_cursor, SUMMARY_PAGE_SIZE) : EMPTY
+      ),
+      reduce((summary: Summary, page: Summary) => ({
+        ...summary,
+        transactions: summary.transactions.concat(page.transactions || []),
+        next_cursor: null
+      }))
+    );
+  }
+
   /** ===== Pre-detection merchant donut: Fraud vs Legit ===== */
   private renderMerchantDonut() {
     if (!this.merchantSummary) return;
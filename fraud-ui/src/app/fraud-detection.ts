@@ -1,5 +1,5 @@
 import { Injectable } from '@angular/core';
-import { HttpClient } from '@angular/common/http';
+import { HttpClient, HttpParams } from '@angular/common/http';
 import { Observable } from 'rxjs';
 import { environment } from '../environments/environment';
 
@@ -51,9 +51,12 @@ export class FraudDetection {
     return this.http.post(`${this.predictUrl}/${fraudType}/`, formData);
   }
 
-  // Fetch summary
-  getSummary(): Observable<any> {
-    return this.http.get(`${this.baseUrl}/temp-summary/`);
+  // Fetch summary (one keyset page of transactions, after `cursor`)
+  getSummary(cursor?: number, limit?: number): Observable<any> {
+    let params = new HttpParams();
+    if (cursor != null) params = params.set('cursor', cursor);
+    if (limit != null) params = params.set('limit', limit);
+    return this.http.get(`${this.baseUrl}/temp-summary/`, { params });
   }
 
   // Clear temp table
@@ -0,0 +1,12 @@
+from rest_framework.pagination import CursorPagination
+
+
+class FraudulentRecordsPagination(CursorPagination):
+    """
+    Newest-first cursor paging over created_at; the opaque ?cursor= token
+    keeps every page an index range scan, however deep the client pages.
+    """
+    page_size = 100
+    page_size_query_param = "limit"
+    max_page_size = 1000
+    ordering = ("-created_at", "-id")
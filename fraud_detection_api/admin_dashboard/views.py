@@ -1,13 +1,17 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from django.db.models import Count, Q
 from detection.models import FraudPrediction
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
 import pandas as pd
 import numpy as np
+from datetime import datetime, time
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from detection.services.fraud_service import FraudService
+from detection.services.dashboard import fraud_type_summary, merchant_fraud, cached_aggregate, ALL_PREDICTIONS
+from .pagination import FraudulentRecordsPagination
 
 # Fraud summary by type
 class FraudTypeSummaryView(APIView):
@@ -16,16 +20,8 @@ class FraudTypeSummaryView(APIView):
     """
 
     def get(self, request):
-        data = (
-            FraudPrediction.objects
-            .values("fraud_type")
-            .annotate(
-                total_transactions=Count("id"),
-                fraudulent=Count("id", filter=Q(status=True)),
-                non_fraudulent=Count("id", filter=Q(status=False))
-            )
-        )
-        return Response(list(data))
+        data = cached_aggregate("fraud-summary", [ALL_PREDICTIONS], lambda: list(fraud_type_summary()))
+        return Response(data)
 
 
 # Merchant-level fraud stats
@@ -35,26 +31,69 @@ class MerchantFraudView(APIView):
     """
 
     def get(self, request):
-        data = (
-            FraudPrediction.objects
-            .values("merchant_name")
-            .annotate(
-                total=Count("id"),
-                fraudulent=Count("id", filter=Q(status=True))
-            )
-        )
-        return Response(list(data))
+        data = cached_aggregate("merchant-fraud", [ALL_PREDICTIONS], lambda: [
+            {**row, "merchant_name": row["merchant_name"] or None}
+            for row in merchant_fraud()
+        ])
+        return Response(data)
 
 
 #  Detailed fraudulent records
 class FraudulentRecordsView(APIView):
     """
-    Returns detailed fraudulent records for admin inspection.
+    Returns detailed fraudulent records for admin inspection, newest first.
+    Filters: status (true by default, false or all), fraud_type, merchant,
+    date_from / date_to (ISO date or datetime on created_at).
+    Paged with ?cursor= (from next/previous) and ?limit= (max 1000).
     """
+    pagination_class = FraudulentRecordsPagination
 
     def get(self, request):
-        data = (
-            FraudPrediction.objects
-            .values("transaction_id", "merchant_name", "fraud_type", "captured_text", "status")
+        params = request.query_params
+        records = FraudPrediction.objects.all()
+
+        status_param = params.get("status", "true").lower()
+        if status_param in ("true", "1"):
+            records = records.filter(status=True)
+        elif status_param in ("false", "0"):
+            records = records.filter(status=False)
+        elif status_param != "all":
+            return Response({"error": "status must be true, false or all"}, status=400)
+
+        if params.get("fraud_type"):
+            records = records.filter(fraud_type=params["fraud_type"])
+        if params.get("merchant"):
+            records = records.filter(merchant_name=params["merchant"])
+
+        for name, lookup in (("date_from", "created_at__gte"), ("date_to", "created_at__lte")):
+            if params.get(name):
+                value = _parse_date_param(params[name], end_of_day=(name == "date_to"))
+                if value is None:
+                    return Response({"error": f"{name} must be an ISO date or datetime"}, status=400)
+                records = records.filter(**{lookup: value})
+
+        data = records.values(
+            "id", "transaction_id", "merchant_name", "fraud_type", "captured_text", "status", "created_at"
         )
-        return Response(list(data))
\ No newline at end of file
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(data, request, view=self)
+        return paginator.get_paginated_response(page)
+
+
+def _parse_date_param(value: str, end_of_day: bool = False):
+    """
+    Parse a date or datetime query value as an aware datetime, or return None.
+    A plain date_to covers its whole day.
+    """
+    try:
+        parsed = parse_datetime(value)
+        day = None if parsed is not None else parse_date(value)
+    except ValueError:
+        return None
+    if parsed is None:
+        if day is None:
+            return None
+        parsed = datetime.combine(day, time.max if end_of_day else time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
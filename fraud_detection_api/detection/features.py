@@ -7,4 +7,16 @@ def engineer(df: pd.DataFrame) -> pd.DataFrame:
         df["trans_hour"] = ts.dt.hour
         df["trans_dow"] = ts.dt.dayofweek
     logging.info("Feature engineering complete. Shape: %s", df.shape)
-    return df
\ No newline at end of file
+    return df
+
+
+def engineer_record(record: dict) -> dict:
+    """
+    Row-level version of engineer() for a single JSON record.
+    """
+    if "Transaction Date" in record:
+        record = dict(record)
+        ts = pd.to_datetime(record["Transaction Date"], errors="coerce")
+        record["trans_hour"] = float("nan") if pd.isna(ts) else ts.hour
+        record["trans_dow"] = float("nan") if pd.isna(ts) else ts.dayofweek
+    return record
@@ -0,0 +1,43 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from detection.services.archive import (
+    archive_batch, archive_cutoff, ArchiveUnavailable, ARCHIVE_BATCH_ROWS, ARCHIVE_DIR, RETENTION_DAYS,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Move predictions older than the retention horizon from fraud_predictions_new "
+        "to Parquet files partitioned by fraud_type/date, deleting them in batches. "
+        "Daily rollups are kept, so the dashboard totals still include archived rows."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=RETENTION_DAYS, help="Whole days kept in the hot table")
+        parser.add_argument("--batch-rows", type=int, default=ARCHIVE_BATCH_ROWS, help="Rows archived per transaction")
+        parser.add_argument("--loop", action="store_true", help="Keep running and archive again every --interval seconds")
+        parser.add_argument("--interval", type=int, default=3600, help="Seconds between runs with --loop")
+
+    def handle(self, *args, **opts):
+        if opts["days"] < 0 or opts["batch_rows"] < 1:
+            raise CommandError("--days must be >= 0 and --batch-rows >= 1")
+
+        while True:
+            cutoff = archive_cutoff(opts["days"])
+            started = time.perf_counter()
+            archived = 0
+            try:
+                while True:
+                    moved = archive_batch(cutoff, opts["batch_rows"])
+                    if not moved:
+                        break
+                    archived += moved
+            except ArchiveUnavailable as exc:
+                raise CommandError(str(exc))
+            self.stdout.write(
+                f"archived {archived} predictions created before {cutoff.isoformat()} "
+                f"to {ARCHIVE_DIR} in {time.perf_counter() - started:.1f}s"
+            )
+            if not opts["loop"]:
+                return
+            time.sleep(opts["interval"])
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from django.core.management.base import BaseCommand, CommandError
+from detection import features as fe
+from detection.services.ensemble import load_ensemble
+from detection.services.fraud_service import FraudService, AVAILABLE_MODELS
+from detection.services.prediction_cache import prediction_cache
+
+
+class Command(BaseCommand):
+    help = (
+        "Check that the JSON record path (compiled feature-vector builder) "
+        "reproduces the fitted ColumnTransformer and the DataFrame scores on a CSV sample."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("fraud_type")
+        parser.add_argument("csv", help="CSV in the upload format (label column optional)")
+        parser.add_argument("--rows", type=int, default=1000, help="Rows read from the CSV")
+
+    def handle(self, *args, **opts):
+        fraud_type = opts["fraud_type"]
+        df = pd.read_csv(opts["csv"], nrows=opts["rows"]).drop(columns=["label"], errors="ignore")
+        records = [fe.engineer_record(r) for r in df.to_dict("records")]
+        df = fe.engineer(df)
+
+        fused = load_ensemble(fraud_type, AVAILABLE_MODELS)
+        if fused is None or fused.row_vectorizer is None:
+            raise CommandError(f"The {fraud_type} preprocessor cannot be compiled; JSON scoring falls back to pandas")
+
+        expected = fused.transform(df)
+        actual = fused.row_vectorizer.transform(records)
+        if sparse.issparse(expected) != sparse.issparse(actual):
+            raise CommandError("Sparse/dense output differs from the ColumnTransformer")
+        if sparse.issparse(expected):
+            # XGBoost reads absent sparse entries as missing, so the pattern must match too
+            same_pattern = (expected != 0).nnz == actual.nnz and ((expected != 0) != (actual != 0)).nnz == 0
+            expected, actual = expected.toarray(), actual.toarray()
+        else:
+            same_pattern = True
+        matrix_diff = float(np.abs(expected - actual).max()) if expected.size else 0.0
+        self.stdout.write(f"features: rows={len(df)} width={actual.shape[1]} max_abs_diff={matrix_diff:.3g}")
+
+        service = FraudService(fraud_type)
+        failed = not same_pattern or matrix_diff > 0
+        for start in range(0, len(records), 32):
+            batch = records[start:start + 32]
+            # Both paths share the prediction cache; score each one fresh
+            prediction_cache.clear()
+            got = service.predict_records(batch, models=AVAILABLE_MODELS)
+            prediction_cache.clear()
+            want = service.predict_many(df.iloc[start:start + 32], models=AVAILABLE_MODELS)
+            for name in AVAILABLE_MODELS:
+                if got[name] != want[name].tolist() or got[f"{name}_probability"] != want[f"{name}_probability"].tolist():
+                    failed = True
+        self.stdout.write(f"scores: {'FAIL' if failed else 'OK'}")
+        if failed:
+            raise CommandError("JSON record scoring differs from the DataFrame path")
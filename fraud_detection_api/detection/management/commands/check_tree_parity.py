@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+from django.core.management.base import BaseCommand, CommandError
+from detection import features as fe
+from detection.services.model_loader import registry
+from detection.services.ensemble import load_compiled
+from detection.services.tree_engine import BLOCK_ROWS
+
+# XGBoost sums leaves and applies the sigmoid in float32
+TOLERANCE = {"random_forest": 1e-12, "xgboost": 1e-6}
+
+
+class Command(BaseCommand):
+    help = (
+        "Check that the exported tree arrays (<model>.trees.npz) reproduce the "
+        "original pipeline's predict_proba on a CSV sample."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("fraud_type")
+        parser.add_argument("csv", help="CSV in the upload format (label column optional)")
+        parser.add_argument("--models", nargs="+", default=list(TOLERANCE))
+        parser.add_argument("--rows", type=int, default=5000, help="Rows read from the CSV")
+
+    def handle(self, *args, **opts):
+        df = fe.engineer(pd.read_csv(opts["csv"], nrows=opts["rows"]))
+        X = df.drop(columns=["label"], errors="ignore")
+
+        failed = []
+        for model_name in opts["models"]:
+            compiled = load_compiled(opts["fraud_type"], model_name)
+            if compiled is None:
+                raise CommandError(f"No exported tree arrays for {opts['fraud_type']}/{model_name}")
+            pipe = registry.get(opts["fraud_type"], model_name)
+            Xt = pipe.named_steps["preprocessor"].transform(X)
+
+            expected = pipe.named_steps["model"].predict_proba(Xt)
+            # Both the batched path and the single-row path
+            batched = compiled.predict_proba(Xt)
+            single = np.vstack([compiled.predict_proba(Xt[i:i + 1]) for i in range(min(len(X), BLOCK_ROWS // 8))])
+
+            max_diff = max(
+                float(np.abs(expected - batched).max()),
+                float(np.abs(expected[:len(single)] - single).max()),
+            )
+            mismatched = int((pipe.named_steps["model"].predict(Xt) != compiled.predict(Xt)).sum())
+            tolerance = TOLERANCE.get(model_name, 1e-6)
+            ok = max_diff <= tolerance and mismatched == 0
+
+            self.stdout.write(
+                f"{model_name}: rows={len(X)} max_abs_diff={max_diff:.3g} "
+                f"class_mismatches={mismatched} {'OK' if ok else 'FAIL'}"
+            )
+            if not ok:
+                failed.append(model_name)
+
+        if failed:
+            raise CommandError(f"Tree array parity failed for: {', '.join(failed)}")
@@ -0,0 +1,36 @@
+import time
+from django.core.management.base import BaseCommand
+from detection.services.write_behind import get_journal
+
+
+class Command(BaseCommand):
+    help = (
+        "Write the predictions waiting in the write-behind journal to the database "
+        "(e.g. after turning FRAUD_WRITE_BEHIND off), or run as a dedicated drainer with --loop."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="Keep draining every --interval seconds")
+        parser.add_argument("--interval", type=float, default=1.0)
+        parser.add_argument(
+            "--requeue-parked", action="store_true",
+            help="First give entries parked after repeated failures another round of attempts",
+        )
+
+    def handle(self, *args, **opts):
+        journal = get_journal()
+        if opts["requeue_parked"]:
+            self.stdout.write(f"requeued {journal.requeue_parked()} parked entries")
+        while True:
+            started = time.perf_counter()
+            drained_before = journal.drained_rows
+            journal.drain()
+            stats = journal.stats()
+            if not opts["loop"] or stats["drained_rows"] != drained_before:
+                self.stdout.write(
+                    f"drained {stats['drained_rows'] - drained_before} rows in {time.perf_counter() - started:.1f}s; "
+                    f"pending={stats['pending_rows']}"
+                )
+            if not opts["loop"]:
+                return
+            time.sleep(opts["interval"])
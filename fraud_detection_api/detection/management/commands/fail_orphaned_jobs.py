@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from detection.services.jobs import fail_orphaned_jobs
+
+
+class Command(BaseCommand):
+    help = (
+        "Mark this host's QUEUED/RUNNING scoring jobs FAILED when the server process "
+        "that ran them is gone (run after a restart, or periodically; status reads "
+        "also check the job they return)."
+    )
+
+    def handle(self, *args, **opts):
+        self.stdout.write(f"failed {fail_orphaned_jobs()} interrupted scoring jobs")
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Min
+from django.utils import timezone
+from detection.models import FraudDailyRollup, FraudPrediction
+from detection.services.rollups import aggregate_predictions
+from detection.services.dashboard import clear_dashboard_cache
+from detection.utils import BULK_CREATE_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the daily fraud rollups from fraud_predictions_new (backfill, "
+        "or repair after rows were changed outside the upload endpoints). Rollups "
+        "of days before the oldest stored prediction (archived days) are kept."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fraud-type", help="Only rebuild the rollups of this fraud type")
+
+    def handle(self, *args, **opts):
+        predictions = FraudPrediction.objects.all()
+        rollups = FraudDailyRollup.objects.all()
+        if opts["fraud_type"]:
+            predictions = predictions.filter(fraud_type=opts["fraud_type"])
+            rollups = rollups.filter(fraud_type=opts["fraud_type"])
+        oldest = predictions.aggregate(oldest=Min("created_at"))["oldest"]
+        if oldest is None:
+            rollups = rollups.none()
+        else:
+            rollups = rollups.filter(day__gte=timezone.localdate(oldest))
+
+        # Replace in one transaction so the summaries never read a partial rebuild
+        with transaction.atomic():
+            fresh = aggregate_predictions(predictions)
+            deleted, _ = rollups.delete()
+            FraudDailyRollup.objects.bulk_create(fresh, batch_size=BULK_CREATE_BATCH_SIZE)
+        clear_dashboard_cache()
+
+        self.stdout.write(
+            f"rollups: removed={deleted} written={len(fresh)} "
+            f"predictions={sum(rollup.total for rollup in fresh)}"
+        )
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:09
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('detection', '0002_fraudpredictiontemp'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScoringJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('fraud_type', models.CharField(max_length=50)),
+                ('merchant_name', models.CharField(blank=True, max_length=100, null=True)),
+                ('input_path', models.CharField(max_length=500)),
+                ('result_path', models.CharField(max_length=500)),
+                ('status', models.CharField(choices=[('QUEUED', 'Queued'), ('RUNNING', 'Running'), ('DONE', 'Done'), ('FAILED', 'Failed')], default='QUEUED', max_length=20)),
+                ('rows_total', models.IntegerField(blank=True, null=True)),
+                ('rows_done', models.IntegerField(default=0)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'fraud_scoring_jobs',
+            },
+        ),
+    ]
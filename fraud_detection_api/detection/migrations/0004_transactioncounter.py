@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:26
+
+from django.db import migrations, models
+
+
+def seed_counter(apps, schema_editor):
+    """
+    Start the counter after the highest txn<N> already stored, so new ids
+    never collide with rows written by the old allocator.
+    """
+    FraudPrediction = apps.get_model('detection', 'FraudPrediction')
+    TransactionCounter = apps.get_model('detection', 'TransactionCounter')
+    highest = 100
+    ids = FraudPrediction.objects.filter(transaction_id__startswith='txn').values_list('transaction_id', flat=True)
+    for transaction_id in ids.iterator(chunk_size=10000):
+        try:
+            highest = max(highest, int(transaction_id[3:]))
+        except ValueError:
+            continue
+    TransactionCounter.objects.update_or_create(pk='transaction_id', defaults={'next_value': highest + 1})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('detection', '0003_scoringjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransactionCounter',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('next_value', models.BigIntegerField()),
+            ],
+            options={
+                'db_table': 'fraud_transaction_counters',
+            },
+        ),
+        migrations.RunPython(seed_counter, migrations.RunPython.noop),
+    ]
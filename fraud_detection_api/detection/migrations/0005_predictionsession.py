@@ -0,0 +1,66 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+TEMP_COPY_FIELDS = [
+    'fraud_type', 'input_data', 'transaction_id', 'merchant_name', 'captured_text', 'status',
+    'random_forest', 'random_forest_probability', 'log_reg', 'log_reg_probability',
+    'xgboost', 'xgboost_probability',
+]
+
+
+def temp_rows_to_session(apps, schema_editor):
+    """
+    Put the predictions currently copied into fraud_predictions_temp into the
+    first upload session, so temp-summary shows the same rows after upgrade.
+    """
+    FraudPrediction = apps.get_model('detection', 'FraudPrediction')
+    FraudPredictionTemp = apps.get_model('detection', 'FraudPredictionTemp')
+    PredictionSession = apps.get_model('detection', 'PredictionSession')
+    session = PredictionSession.objects.create()
+    FraudPrediction.objects.filter(
+        transaction_id__in=FraudPredictionTemp.objects.values('transaction_id')
+    ).update(session=session)
+
+
+def session_to_temp_rows(apps, schema_editor):
+    FraudPrediction = apps.get_model('detection', 'FraudPrediction')
+    FraudPredictionTemp = apps.get_model('detection', 'FraudPredictionTemp')
+    PredictionSession = apps.get_model('detection', 'PredictionSession')
+    current = PredictionSession.objects.order_by('-id').first()
+    if current is None:
+        return
+    rows = FraudPrediction.objects.filter(session=current).values(*TEMP_COPY_FIELDS)
+    FraudPredictionTemp.objects.bulk_create(
+        (FraudPredictionTemp(**row) for row in rows.iterator(chunk_size=1000)), batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('detection', '0004_transactioncounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PredictionSession',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'fraud_prediction_sessions',
+            },
+        ),
+        migrations.AddField(
+            model_name='fraudprediction',
+            name='session',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='predictions', to='detection.predictionsession'),
+        ),
+        migrations.RunPython(temp_rows_to_session, session_to_temp_rows),
+        migrations.DeleteModel(
+            name='FraudPredictionTemp',
+        ),
+    ]
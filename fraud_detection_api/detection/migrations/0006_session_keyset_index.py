@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('detection', '0005_predictionsession'),
+    ]
+
+    operations = [
+        # Add the composite index first: MySQL only lets the FK's own index go
+        # once another index starts with session_id
+        migrations.AddIndex(
+            model_name='fraudprediction',
+            index=models.Index(fields=['session', 'id'], name='fraud_pred_session_id_idx'),
+        ),
+        migrations.AlterField(
+            model_name='fraudprediction',
+            name='session',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='predictions', to='detection.predictionsession'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('detection', '0006_session_keyset_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='fraudprediction',
+            index=models.Index(fields=['status', 'created_at'], name='fraud_pred_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fraudprediction',
+            index=models.Index(fields=['fraud_type', 'status', 'created_at'], name='fraud_pred_type_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fraudprediction',
+            index=models.Index(fields=['merchant_name', 'status', 'created_at'], name='fraud_pred_merch_created_idx'),
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:39
+
+from django.db import migrations, models
+from django.db.models import Count, FloatField, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+
+
+def backfill_rollups(apps, schema_editor):
+    """
+    Build the daily rollups from the predictions already stored.
+    """
+    FraudPrediction = apps.get_model('detection', 'FraudPrediction')
+    FraudDailyRollup = apps.get_model('detection', 'FraudDailyRollup')
+    sums = {
+        f'{name}_probability_sum': Coalesce(Sum(f'{name}_probability'), Value(0.0), output_field=FloatField())
+        for name in ('random_forest', 'log_reg', 'xgboost')
+    }
+    rows = (
+        FraudPrediction.objects
+        .annotate(rollup_merchant=Coalesce('merchant_name', Value('')), day=TruncDate('created_at'))
+        .values('rollup_merchant', 'fraud_type', 'day')
+        .annotate(
+            total=Count('id'),
+            fraudulent=Count('id', filter=Q(status=True)),
+            non_fraudulent=Count('id', filter=Q(status=False)),
+            **sums,
+        )
+        .order_by()
+    )
+    FraudDailyRollup.objects.bulk_create(
+        [FraudDailyRollup(merchant_name=row.pop('rollup_merchant'), **row) for row in rows],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('detection', '0007_admin_record_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FraudDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('merchant_name', models.CharField(blank=True, default='', max_length=100)),
+                ('fraud_type', models.CharField(max_length=50)),
+                ('day', models.DateField()),
+                ('total', models.IntegerField(default=0)),
+                ('fraudulent', models.IntegerField(default=0)),
+                ('non_fraudulent', models.IntegerField(default=0)),
+                ('random_forest_probability_sum', models.FloatField(default=0.0)),
+                ('log_reg_probability_sum', models.FloatField(default=0.0)),
+                ('xgboost_probability_sum', models.FloatField(default=0.0)),
+            ],
+            options={
+                'db_table': 'fraud_daily_rollups',
+                'constraints': [models.UniqueConstraint(fields=('merchant_name', 'fraud_type', 'day'), name='fraud_rollup_key')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
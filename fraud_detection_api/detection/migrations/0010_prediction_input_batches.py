@@ -0,0 +1,92 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:46
+
+import json
+import zlib
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import F
+
+ROWS_PER_BATCH = 1000
+
+
+def pack_inputs(apps, schema_editor):
+    """
+    Move every stored input_data into compressed input batches covering
+    ROWS_PER_BATCH predictions each, in id order. A batch's payload spans its
+    id range (None for gaps), so offsets are id - first id and each batch is
+    linked with a single UPDATE.
+    """
+    FraudPrediction = apps.get_model('detection', 'FraudPrediction')
+    PredictionInputBatch = apps.get_model('detection', 'PredictionInputBatch')
+    last_id = 0
+    while True:
+        rows = list(
+            FraudPrediction.objects.filter(id__gt=last_id).order_by('id').values('id', 'input_data')[:ROWS_PER_BATCH]
+        )
+        if not rows:
+            break
+        first_id, last_id = rows[0]['id'], rows[-1]['id']
+        inputs = [None] * (last_id - first_id + 1)
+        for row in rows:
+            inputs[row['id'] - first_id] = row['input_data']
+        batch = PredictionInputBatch.objects.create(
+            payload=zlib.compress(json.dumps(inputs, default=str).encode()), row_count=len(inputs)
+        )
+        FraudPrediction.objects.filter(id__gte=first_id, id__lte=last_id).update(
+            input_batch_id=batch.id, input_offset=F('id') - first_id
+        )
+
+
+def unpack_inputs(apps, schema_editor):
+    FraudPrediction = apps.get_model('detection', 'FraudPrediction')
+    PredictionInputBatch = apps.get_model('detection', 'PredictionInputBatch')
+    for batch in PredictionInputBatch.objects.iterator(chunk_size=100):
+        inputs = json.loads(zlib.decompress(batch.payload))
+        predictions = list(FraudPrediction.objects.filter(input_batch_id=batch.id).only('id', 'input_offset'))
+        for prediction in predictions:
+            prediction.input_data = inputs[prediction.input_offset]
+        FraudPrediction.objects.bulk_update(predictions, ['input_data'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('detection', '0009_frauddailyrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PredictionInputBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('payload', models.BinaryField()),
+                ('row_count', models.IntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'fraud_prediction_inputs',
+            },
+        ),
+        migrations.AddField(
+            model_name='fraudprediction',
+            name='input_offset',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='fraudprediction',
+            name='input_batch',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='predictions', to='detection.predictioninputbatch'),
+        ),
+        # Nullable first, so reversing the removal can re-add the column to a populated table
+        migrations.AlterField(
+            model_name='fraudprediction',
+            name='input_data',
+            field=models.JSONField(null=True),
+        ),
+        migrations.RunPython(pack_inputs, unpack_inputs),
+        migrations.RemoveField(
+            model_name='fraudprediction',
+            name='input_data',
+        ),
+    ]
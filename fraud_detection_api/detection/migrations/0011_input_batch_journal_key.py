@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('detection', '0010_prediction_input_batches'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='predictioninputbatch',
+            name='journal_key',
+            field=models.CharField(blank=True, max_length=32, null=True, unique=True),
+        ),
+    ]
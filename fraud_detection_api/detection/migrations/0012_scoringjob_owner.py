@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('detection', '0011_input_batch_journal_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scoringjob',
+            name='owner',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+    ]
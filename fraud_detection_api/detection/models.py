@@ -1,3 +1,6 @@
+import json
+import uuid
+import zlib
 from django.db import models
 
 class FraudPrediction(models.Model):
@@ -21,12 +24,21 @@ class FraudPrediction(models.Model):
 
 class FraudPrediction(models.Model):
     fraud_type = models.CharField(max_length=50)
-    input_data = models.JSONField()
+    # Raw CSV row: entry input_offset of the input_batch payload, read only for record details
+    input_batch = models.ForeignKey(
+        "PredictionInputBatch", null=True, blank=True, on_delete=models.SET_NULL, related_name="predictions",
+    )
+    input_offset = models.IntegerField(null=True, blank=True)
 
     transaction_id = models.CharField(max_length=50, unique=True, null=True, blank=True)
     merchant_name = models.CharField(max_length=100, null=True, blank=True)
     captured_text = models.TextField(null=True, blank=True)
     status = models.BooleanField(default=False)
+    # Upload session shown by the temp-summary views (null for predict-batch rows)
+    session = models.ForeignKey(
+        "PredictionSession", null=True, blank=True, on_delete=models.SET_NULL, related_name="predictions",
+        db_index=False,
+    )
 
     # Model predictions
     random_forest = models.BooleanField(null=True, blank=True)
@@ -42,26 +54,133 @@ class FraudPrediction(models.Model):
 
     class Meta:
         db_table = "fraud_predictions_new"
+        indexes = [
+            # Session lookups and id-keyset paging of the current session
+            models.Index(fields=["session", "id"], name="fraud_pred_session_id_idx"),
+            # Admin fraudulent-records: equality filters, then newest-first created_at
+            models.Index(fields=["status", "created_at"], name="fraud_pred_status_created_idx"),
+            models.Index(fields=["fraud_type", "status", "created_at"], name="fraud_pred_type_created_idx"),
+            models.Index(fields=["merchant_name", "status", "created_at"], name="fraud_pred_merch_created_idx"),
+        ]
+
+class PredictionInputBatch(models.Model):
+    """
+    Raw input rows of one saved chunk as zlib-compressed JSON (a list in row
+    order). Kept out of fraud_predictions_new so list and aggregate queries
+    read narrow rows.
+    """
+    payload = models.BinaryField()
+    row_count = models.IntegerField()
+    # Write-behind journal entry this chunk was drained from; guards against applying it twice
+    journal_key = models.CharField(max_length=32, unique=True, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
 
-class FraudPredictionTemp(models.Model):
-    fraud_type = models.CharField(max_length=50)
-    input_data = models.JSONField()
+    class Meta:
+        db_table = "fraud_prediction_inputs"
+
+    @classmethod
+    def pack(cls, rows: list) -> "PredictionInputBatch":
+        return cls(payload=zlib.compress(json.dumps(rows, default=str).encode()), row_count=len(rows))
+
+    def rows(self) -> list:
+        return json.loads(zlib.decompress(self.payload))
+
+    @classmethod
+    def input_rows(cls, refs) -> list:
+        """
+        Raw rows for (input_batch_id, input_offset) pairs, decompressing each
+        batch once; None for predictions without a stored input.
+        """
+        batch_ids = {batch_id for batch_id, _ in refs if batch_id is not None}
+        batches = {batch.id: batch.rows() for batch in cls.objects.filter(id__in=batch_ids)}
+        return [
+            batches[batch_id][offset] if batch_id in batches and offset is not None else None
+            for batch_id, offset in refs
+        ]
+
+
+class PredictionSession(models.Model):
+    """
+    Groups the uploads behind the temp-summary views. clear-temp/ starts a new
+    session instead of deleting rows; the latest session is the current one.
+    """
+    created_at = models.DateTimeField(auto_now_add=True)
 
-    transaction_id = models.CharField(max_length=50, unique=True, null=True, blank=True)
-    merchant_name = models.CharField(max_length=100, null=True, blank=True)
-    captured_text = models.TextField(null=True, blank=True)
-    status = models.BooleanField(default=False)
+    class Meta:
+        db_table = "fraud_prediction_sessions"
 
-    random_forest = models.BooleanField(null=True, blank=True)
-    random_forest_probability = models.FloatField(null=True, blank=True)
+    @classmethod
+    def current_id(cls) -> int:
+        session_id = cls.objects.order_by("-id").values_list("id", flat=True).first()
+        if session_id is None:
+            session_id = cls.objects.create().id
+        return session_id
 
-    log_reg = models.BooleanField(null=True, blank=True)
-    log_reg_probability = models.FloatField(null=True, blank=True)
 
-    xgboost = models.BooleanField(null=True, blank=True)
-    xgboost_probability = models.FloatField(null=True, blank=True)
+class ScoringJob(models.Model):
+    STATUS_CHOICES = (
+        ('QUEUED', 'Queued'),
+        ('RUNNING', 'Running'),
+        ('DONE', 'Done'),
+        ('FAILED', 'Failed'),
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    fraud_type = models.CharField(max_length=50)
+    merchant_name = models.CharField(max_length=100, null=True, blank=True)
+
+    # Stored upload and NDJSON results (one response record per line)
+    input_path = models.CharField(max_length=500)
+    result_path = models.CharField(max_length=500)
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='QUEUED')
+    # Web process ("host:pid") whose job pool runs the job; the job dies with it
+    owner = models.CharField(max_length=100, null=True, blank=True)
+    rows_total = models.IntegerField(null=True, blank=True)
+    rows_done = models.IntegerField(default=0)
+    error = models.TextField(null=True, blank=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "fraud_scoring_jobs"
+
+
+class TransactionCounter(models.Model):
+    """
+    Named counter behind the `txn<N>` transaction ids. Uploads reserve a
+    contiguous block of numbers by bumping next_value in one UPDATE.
+    """
+    name = models.CharField(max_length=50, primary_key=True)
+    next_value = models.BigIntegerField()
+
+    class Meta:
+        db_table = "fraud_transaction_counters"
+
+
+class FraudDailyRollup(models.Model):
+    """
+    Per-day prediction counts for one merchant and fraud type, kept up to
+    date by the upload writes. The summary endpoints read these rows instead
+    of aggregating fraud_predictions_new. Missing merchants are stored as "".
+    """
+    merchant_name = models.CharField(max_length=100, blank=True, default="")
+    fraud_type = models.CharField(max_length=50)
+    day = models.DateField()
+
+    total = models.IntegerField(default=0)
+    fraudulent = models.IntegerField(default=0)
+    non_fraudulent = models.IntegerField(default=0)
+
+    # Sums of each model's probability, for averages over any range of days
+    random_forest_probability_sum = models.FloatField(default=0.0)
+    log_reg_probability_sum = models.FloatField(default=0.0)
+    xgboost_probability_sum = models.FloatField(default=0.0)
 
     class Meta:
-        db_table = "fraud_predictions_temp"
\ No newline at end of file
+        db_table = "fraud_daily_rollups"
+        constraints = [
+            models.UniqueConstraint(fields=["merchant_name", "fraud_type", "day"], name="fraud_rollup_key"),
+        ]
@@ -0,0 +1,84 @@
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.settings import api_settings
+
+try:
+    import msgpack
+except ImportError:  # optional: the binary format is only offered when installed
+    msgpack = None
+
+
+def _collect(values: list, prefix: str, columns: dict):
+    """
+    Add one column per key of the dicts in `values`, recursing into keys that
+    hold a dict in every record.
+    """
+    shapes = {tuple(value) for value in values}
+    if len(shapes) == 1:
+        keys = shapes.pop()
+    else:
+        keys = dict.fromkeys(key for value in values for key in value)
+    for key in keys:
+        column = [value.get(key) for value in values]
+        if all(isinstance(item, dict) for item in column):
+            _collect(column, f"{prefix}{key}.", columns)
+        else:
+            columns[f"{prefix}{key}"] = column
+
+
+def to_columns(records: list) -> dict:
+    """
+    Turn a list of (nested) result dicts into one array per field. Nested keys
+    are joined with dots, e.g. "random_forest.probability"; a field missing
+    from a record is null in its column.
+    """
+    columns = {}
+    if records:
+        _collect(records, "", columns)
+    return columns
+
+
+def columnar(data):
+    """
+    Columnar form of a response body: the "results" list (or a top-level
+    list of records) becomes {field: [values]}; everything else is unchanged.
+    """
+    if isinstance(data, dict) and isinstance(data.get("results"), list):
+        data = dict(data)
+        data["results"] = to_columns(data["results"])
+    elif isinstance(data, list) and data and all(isinstance(record, dict) for record in data):
+        data = to_columns(data)
+    return data
+
+
+class ColumnarJSONRenderer(JSONRenderer):
+    """
+    JSON with result records transposed into columns, so field names are
+    written once per response instead of once per record.
+    """
+    media_type = "application/vnd.fraud.columnar+json"
+    format = "columnar"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return super().render(columnar(data), accepted_media_type, renderer_context)
+
+
+class MsgpackRenderer(BaseRenderer):
+    """
+    The columnar body encoded as MessagePack (binary floats, no text formatting).
+    """
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return msgpack.packb(columnar(data), default=str, use_bin_type=True)
+
+
+# Renderers for views that return lists of scored records; plain JSON stays
+# the default, the compact formats are chosen through the Accept header.
+RESULT_RENDERER_CLASSES = list(api_settings.DEFAULT_RENDERER_CLASSES) + [ColumnarJSONRenderer]
+if msgpack is not None:
+    RESULT_RENDERER_CLASSES.append(MsgpackRenderer)
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import FraudPrediction
+from .models import FraudPrediction, ScoringJob
 
 class FraudPredictionSerializer(serializers.ModelSerializer):
     class Meta:
@@ -7,6 +7,30 @@ class FraudPredictionSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 class FraudPredictionSerializer(serializers.ModelSerializer):
+    # Unpacked from the prediction's input batch; select_related("input_batch")
+    input_data = serializers.SerializerMethodField()
+
     class Meta:
         model = FraudPrediction
-        fields = "__all__"
\ No newline at end of file
+        exclude = ["input_batch", "input_offset"]
+
+    def get_input_data(self, obj):
+        if obj.input_batch is None or obj.input_offset is None:
+            return None
+        return obj.input_batch.rows()[obj.input_offset]
+
+
+class ScoringJobSerializer(serializers.ModelSerializer):
+    progress = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ScoringJob
+        fields = [
+            "id", "fraud_type", "merchant_name", "status", "rows_total", "rows_done",
+            "progress", "error", "created_at", "started_at", "finished_at",
+        ]
+
+    def get_progress(self, obj):
+        if not obj.rows_total:
+            return 1.0 if obj.status == "DONE" else 0.0
+        return round(obj.rows_done / obj.rows_total, 3)
@@ -0,0 +1,186 @@
+import os
+import json
+from datetime import datetime, time, timedelta
+from itertools import groupby
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from detection.models import FraudPrediction, PredictionInputBatch
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional: only the archive command and archive reads need it
+    pa = pq = None
+
+ARCHIVE_DIR = str(getattr(settings, "FRAUD_ARCHIVE_DIR", os.path.join(settings.BASE_DIR, "var", "archive")))
+# Predictions older than this many whole days are moved to the archive
+RETENTION_DAYS = getattr(settings, "FRAUD_RETENTION_DAYS", 90)
+# Rows written to Parquet and deleted from the hot table per transaction
+ARCHIVE_BATCH_ROWS = getattr(settings, "FRAUD_ARCHIVE_BATCH_ROWS", 5000)
+
+COLUMNS = [
+    "id", "transaction_id", "fraud_type", "merchant_name", "captured_text", "status", "session_id",
+    "random_forest", "random_forest_probability",
+    "log_reg", "log_reg_probability",
+    "xgboost", "xgboost_probability",
+    "created_at", "input_batch_id", "input_offset",
+]
+
+
+class ArchiveUnavailable(RuntimeError):
+    pass
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ArchiveUnavailable("Parquet archival needs pyarrow (pip install pyarrow)")
+
+
+def _schema():
+    return pa.schema([
+        ("id", pa.int64()),
+        ("transaction_id", pa.string()),
+        ("fraud_type", pa.string()),
+        ("merchant_name", pa.string()),
+        ("captured_text", pa.string()),
+        ("status", pa.bool_()),
+        ("session_id", pa.int64()),
+        ("random_forest", pa.bool_()),
+        ("random_forest_probability", pa.float64()),
+        ("log_reg", pa.bool_()),
+        ("log_reg_probability", pa.float64()),
+        ("xgboost", pa.bool_()),
+        ("xgboost_probability", pa.float64()),
+        ("created_at", pa.timestamp("us", tz="UTC")),
+        # Raw CSV row as JSON text; it has no fixed schema across fraud types
+        ("input_data", pa.string()),
+    ])
+
+
+def archive_cutoff(retention_days: int = RETENTION_DAYS):
+    """
+    Start of the oldest day kept in the hot table. Only whole days are
+    archived, so a day's rows are either all hot or all in Parquet.
+    """
+    first_kept = timezone.localdate() - timedelta(days=retention_days)
+    return timezone.make_aware(datetime.combine(first_kept, time.min))
+
+
+def partition_dir(fraud_type: str, day) -> str:
+    return os.path.join(ARCHIVE_DIR, f"fraud_type={fraud_type}", f"date={day.isoformat()}")
+
+
+def _write_part(rows: list):
+    """
+    Write rows of one (fraud_type, day) as part-<first id>-<last id>.parquet.
+    The name depends only on the ids, so re-archiving a batch after a crash
+    between the write and the delete replaces the file instead of duplicating it.
+    """
+    first = rows[0]
+    directory = partition_dir(first["fraud_type"], timezone.localdate(first["created_at"]))
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"part-{rows[0]['id']:012d}-{rows[-1]['id']:012d}.parquet")
+
+    for row in rows:
+        row["input_data"] = json.dumps(row["input_data"], default=str)
+    table = pa.Table.from_pylist(rows, schema=_schema())
+    tmp_path = path + ".tmp"
+    pq.write_table(table, tmp_path, compression="zstd")
+    os.replace(tmp_path, path)
+
+
+def archive_batch(cutoff, batch_rows: int = ARCHIVE_BATCH_ROWS) -> int:
+    """
+    Move the oldest batch of predictions created before cutoff to Parquet:
+    files are written first, then the rows are deleted in one transaction.
+    Returns:
+        int -> rows archived (0 once nothing is older than cutoff)
+    """
+    _require_pyarrow()
+    rows = list(
+        FraudPrediction.objects
+        .filter(created_at__lt=cutoff)
+        .order_by("id")
+        .values(*COLUMNS)[:batch_rows]
+    )
+    if not rows:
+        return 0
+    batch_ids = {row["input_batch_id"] for row in rows} - {None}
+    inputs = PredictionInputBatch.input_rows([(row["input_batch_id"], row["input_offset"]) for row in rows])
+    for row, input_data in zip(rows, inputs):
+        del row["input_batch_id"], row["input_offset"]
+        row["input_data"] = input_data
+
+    def partition(row):
+        return row["fraud_type"], timezone.localdate(row["created_at"])
+
+    for _, part in groupby(sorted(rows, key=partition), key=partition):
+        _write_part(list(part))
+
+    with transaction.atomic():
+        FraudPrediction.objects.filter(id__in=[row["id"] for row in rows]).delete()
+        # Input batches whose predictions are all archived now
+        (
+            PredictionInputBatch.objects
+            .filter(id__in=batch_ids)
+            .exclude(id__in=FraudPrediction.objects.filter(input_batch_id__in=batch_ids).values("input_batch_id"))
+            .delete()
+        )
+    return len(rows)
+
+
+def archived_days(fraud_type: str) -> list:
+    """
+    Archived days of a fraud type, oldest first.
+    """
+    root = os.path.join(ARCHIVE_DIR, f"fraud_type={fraud_type}")
+    if not os.path.isdir(root):
+        return []
+    return sorted(
+        datetime.strptime(name[len("date="):], "%Y-%m-%d").date()
+        for name in os.listdir(root) if name.startswith("date=")
+    )
+
+
+def read_archived(fraud_type: str, date_from=None, date_to=None, cursor: int = 0, limit: int = 100,
+                  merchant_name=None, status=None):
+    """
+    Read archived predictions of one fraud type in id order, keyset-paged
+    like temp-summary: rows with id > cursor, at most `limit` of them.
+    Only the day partitions in [date_from, date_to] are opened, and part
+    files ending at or before the cursor are skipped by name.
+    Returns:
+        tuple -> (records, next_cursor or None)
+    """
+    _require_pyarrow()
+    filters = [("id", ">", cursor)]
+    if merchant_name is not None:
+        filters.append(("merchant_name", "=", merchant_name))
+    if status is not None:
+        filters.append(("status", "=", status))
+
+    # Keyed by id: a part rewritten after an interrupted run may overlap another
+    found = {}
+    for day in archived_days(fraud_type):
+        if (date_from and day < date_from) or (date_to and day > date_to):
+            continue
+        directory = partition_dir(fraud_type, day)
+        for name in sorted(os.listdir(directory)):
+            if not name.endswith(".parquet") or int(name[:-len(".parquet")].rsplit("-", 1)[1]) <= cursor:
+                continue
+            for record in pq.read_table(os.path.join(directory, name), filters=filters).to_pylist():
+                found[record["id"]] = record
+            if len(found) > limit:
+                break
+        if len(found) > limit:
+            break
+
+    records = [found[record_id] for record_id in sorted(found)]
+    has_more = len(records) > limit
+    records = records[:limit]
+    for record in records:
+        record["input_data"] = json.loads(record["input_data"]) if record["input_data"] else None
+    return records, records[-1]["id"] if has_more else None
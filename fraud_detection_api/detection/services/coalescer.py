@@ -0,0 +1,158 @@
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import Future
+
+from django.conf import settings
+from .ensemble import load_ensemble
+from .fraud_service import FraudService, AVAILABLE_MODELS
+
+# Requests arriving within this window are scored together (0, the default, disables coalescing)
+COALESCE_WINDOW_MS = getattr(settings, "FRAUD_COALESCE_WINDOW_MS", 0)
+# A batch is scored as soon as it holds this many rows
+COALESCE_MAX_ROWS = getattr(settings, "FRAUD_COALESCE_MAX_ROWS", 64)
+
+logger = logging.getLogger(__name__)
+
+
+class RequestCoalescer:
+    """
+    Micro-batches concurrent real-time scoring calls.
+
+    Callers hand their records to submit() and block on a future. One worker
+    thread takes the first waiting request, keeps collecting until the window
+    has passed or max_rows is reached, scores everything in one
+    score_batch(records) call and hands each caller its own slice of the
+    column lists back.
+    """
+
+    def __init__(self, score_batch, window_ms: float = COALESCE_WINDOW_MS, max_rows: int = COALESCE_MAX_ROWS):
+        self.score_batch = score_batch
+        self.window = window_ms / 1000.0
+        self.max_rows = max_rows
+        self._queue = queue.Queue()
+        self._carry = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self.queued_rows = 0
+        self.requests = 0
+        self.batches = 0
+        self.rows = 0
+        self.max_batch_rows = 0
+        self.last_batch_rows = 0
+        self.wait_seconds = 0.0
+
+    def _ensure_started(self):
+        # Started on first use, so it is created in each (forked) worker process
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="score-coalescer", daemon=True)
+            self._thread.start()
+
+    def submit(self, records) -> dict:
+        """
+        Queue records for the next batch and wait for their scores.
+        Returns:
+            dict -> the score_batch columns for these records only
+        """
+        future = Future()
+        with self._lock:
+            self._ensure_started()
+            self.queued_rows += len(records)
+        self._queue.put((records, future, time.monotonic()))
+        return future.result()
+
+    def _next_batch(self) -> list:
+        first = self._carry or self._queue.get()
+        self._carry = None
+        batch, rows = [first], len(first[0])
+        deadline = time.monotonic() + self.window
+        while rows < self.max_rows:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if rows + len(item[0]) > self.max_rows:
+                # Keep the batch bounded; this request opens the next one
+                self._carry = item
+                break
+            batch.append(item)
+            rows += len(item[0])
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            records = [record for item in batch for record in item[0]]
+            started = time.monotonic()
+            with self._lock:
+                self.queued_rows -= len(records)
+                self.batches += 1
+                self.requests += len(batch)
+                self.rows += len(records)
+                self.last_batch_rows = len(records)
+                self.max_batch_rows = max(self.max_batch_rows, len(records))
+                self.wait_seconds += sum(started - item[2] for item in batch)
+
+            try:
+                columns = self.score_batch(records)
+            except Exception as exc:
+                logger.exception("Coalesced scoring batch failed")
+                for _, future, _ in batch:
+                    future.set_exception(exc)
+                continue
+
+            start = 0
+            for item_records, future, _ in batch:
+                end = start + len(item_records)
+                future.set_result({name: values[start:end] for name, values in columns.items()})
+                start = end
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "queue_depth": self.queued_rows,
+                "requests": self.requests,
+                "batches": self.batches,
+                "rows": self.rows,
+                "avg_batch_rows": round(self.rows / self.batches, 2) if self.batches else 0.0,
+                "max_batch_rows": self.max_batch_rows,
+                "last_batch_rows": self.last_batch_rows,
+                "avg_queue_wait_ms": round(1000 * self.wait_seconds / self.requests, 3) if self.requests else 0.0,
+                "window_ms": self.window * 1000,
+                "max_rows": self.max_rows,
+            }
+
+
+_coalescers = {}
+_coalescers_lock = threading.Lock()
+
+
+def get_coalescer(fraud_type: str) -> RequestCoalescer:
+    """
+    The coalescer (and worker thread) of one fraud type. Its models are
+    loaded first, so an unknown fraud_type raises FileNotFoundError without
+    leaving a coalescer behind.
+    """
+    with _coalescers_lock:
+        coalescer = _coalescers.get(fraud_type)
+    if coalescer is not None:
+        return coalescer
+
+    load_ensemble(fraud_type, AVAILABLE_MODELS)
+    with _coalescers_lock:
+        coalescer = _coalescers.get(fraud_type)
+        if coalescer is None:
+            service = FraudService(fraud_type)
+            coalescer = RequestCoalescer(lambda records: service.predict_records(records, models=AVAILABLE_MODELS))
+            _coalescers[fraud_type] = coalescer
+        return coalescer
+
+
+def coalescer_stats() -> dict:
+    with _coalescers_lock:
+        coalescers = dict(_coalescers)
+    return {fraud_type: c.stats() for fraud_type, c in coalescers.items()}
@@ -0,0 +1,143 @@
+import time
+import hashlib
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, Q, Sum
+from detection.models import FraudPrediction, FraudDailyRollup
+
+# Cache alias for the aggregate responses. It must be shared by every process
+# that writes predictions (web workers and scoring jobs) for the version bumps
+# to reach all readers, hence a file-based cache in settings.
+DASHBOARD_CACHE = getattr(settings, "FRAUD_DASHBOARD_CACHE", "dashboard")
+
+# Version scope bumped by every prediction write; merchant scopes only by
+# writes of that merchant's rows
+ALL_PREDICTIONS = "all"
+
+
+def fraud_type_summary():
+    """
+    Fraud vs non-fraud counts per fraud_type, summed from the daily rollups.
+    """
+    return (
+        FraudDailyRollup.objects
+        .values("fraud_type")
+        .annotate(
+            total_transactions=Sum("total"),
+            fraudulent=Sum("fraudulent"),
+            non_fraudulent=Sum("non_fraudulent")
+        )
+    )
+
+
+def merchant_fraud():
+    """
+    Total and fraudulent counts per merchant, summed from the daily rollups.
+    Predictions without a merchant are grouped under merchant_name "".
+    """
+    return (
+        FraudDailyRollup.objects
+        .values("merchant_name")
+        .annotate(
+            total=Sum("total"),
+            fraudulent=Sum("fraudulent")
+        )
+    )
+
+
+def merchant_fraud_summary(merchant: str):
+    """
+    Fraud vs non-fraud counts per fraud_type for one merchant, from the
+    daily rollups (a range search on the rollup key).
+    """
+    return (
+        FraudDailyRollup.objects
+        .filter(merchant_name=merchant)
+        .values("fraud_type")
+        .annotate(
+            total_transactions=Sum("total"),
+            fraudulent=Sum("fraudulent"),
+            non_fraudulent=Sum("non_fraudulent")
+        )
+    )
+
+
+def captured_text_summary(session_id: int):
+    """
+    Fraud vs non-fraud counts per captured_text within one upload session,
+    largest categories first. The session prefix of fraud_pred_session_id_idx
+    bounds the scan to that session's rows.
+    """
+    return (
+        FraudPrediction.objects
+        .filter(session_id=session_id)
+        .values("captured_text")
+        .annotate(
+            total=Count("id"),
+            fraud=Count("id", filter=Q(status=True)),
+            non_fraud=Count("id", filter=Q(status=False))
+        )
+        .order_by("-total")
+    )
+
+
+def merchant_scope(merchant_name) -> str:
+    return f"merchant:{merchant_name or ''}"
+
+
+def _version_key(scope: str) -> str:
+    return "dashboard:version:" + hashlib.blake2b(scope.encode(), digest_size=12).hexdigest()
+
+
+def _versions(cache, scopes) -> list:
+    """
+    Current version of every scope. A missing version (first use, or culled
+    by the cache) starts at the clock in nanoseconds rather than 0, so it can
+    never match an entry cached under an older version.
+    """
+    keys = [_version_key(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            cache.add(key, time.time_ns(), timeout=None)
+            found[key] = cache.get(key)
+    return [found[key] for key in keys]
+
+
+def cached_aggregate(name: str, scopes, compute):
+    """
+    Serve an aggregate from the dashboard cache. The key embeds the current
+    version of each scope, so bump_versions makes the next read recompute;
+    the cache timeout only bounds how long unused entries linger.
+    """
+    cache = caches[DASHBOARD_CACHE]
+    versions = _versions(cache, scopes)
+    key = "dashboard:" + hashlib.blake2b(repr((name, versions)).encode(), digest_size=16).hexdigest()
+    data = cache.get(key)
+    if data is None:
+        data = compute()
+        cache.set(key, data)
+    return data
+
+
+def bump_versions(merchant_names):
+    """
+    Invalidate the cached aggregates that include new predictions of these
+    merchants. Call it after the write commits (transaction.on_commit), or a
+    reader could cache the old counts under the new version.
+    """
+    cache = caches[DASHBOARD_CACHE]
+    for scope in [ALL_PREDICTIONS] + sorted({merchant_scope(name) for name in merchant_names}):
+        key = _version_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), timeout=None)
+
+
+def clear_dashboard_cache():
+    """
+    Drop every cached aggregate and version, after bulk changes that do not
+    go through the upload writes (rollup rebuilds, archival).
+    """
+    caches[DASHBOARD_CACHE].clear()
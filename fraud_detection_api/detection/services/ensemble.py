@@ -0,0 +1,147 @@
+import threading
+from functools import cached_property
+import joblib
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from .model_loader import registry
+from .tree_engine import CompiledTrees, TREE_ARRAYS_EXT
+from .row_vectorizer import RowVectorizer
+
+ENSEMBLE_ARTIFACT = "ensemble"
+
+# Score batches of up to this many rows with the exported tree arrays
+# (0 disables them); larger batches stay on sklearn/xgboost native code.
+COMPILED_TREES_MAX_ROWS = getattr(settings, "FRAUD_COMPILED_TREES_MAX_ROWS", 64)
+
+
+def predictions_from_proba(estimator, proba: np.ndarray) -> np.ndarray:
+    """
+    Derive class predictions from predict_proba output (same argmax rule as
+    the estimators' own predict), so the forests are only walked once.
+    """
+    return estimator.classes_.take(np.argmax(proba, axis=1))
+
+
+class FusedEnsemble:
+    """
+    One fitted ColumnTransformer shared by several final estimators.
+
+    The input frame is transformed once and the same (possibly sparse) feature
+    matrix is fed to every estimator, instead of each pipeline re-running
+    imputation, scaling, one-hot and TF-IDF on identical input.
+    """
+
+    def __init__(self, preprocessor, estimators: dict, compiled: dict = None, versions: dict = None):
+        self.preprocessor = preprocessor
+        self.estimators = estimators
+        self.compiled = compiled or {}
+        # Digest of the artifact each estimator was loaded from
+        self.versions = versions or {}
+
+    @classmethod
+    def from_pipelines(cls, pipelines: dict, shared: bool = False):
+        """
+        Fuse separately saved pipelines, or return None when their fitted
+        preprocessors differ and cannot be shared. `shared` skips the
+        comparison for pipelines the ensemble manifest vouches for.
+        The pipelines belong to the model registry and are left untouched;
+        the ensemble keeps its own reference to the first preprocessor.
+        """
+        preprocessors = [pipe.named_steps["preprocessor"] for pipe in pipelines.values()]
+        if not shared and len({joblib.hash(p) for p in preprocessors}) != 1:
+            return None
+        estimators = {name: pipe.named_steps["model"] for name, pipe in pipelines.items()}
+        return cls(preprocessors[0], estimators)
+
+    def transform(self, X: pd.DataFrame):
+        return self.preprocessor.transform(X)
+
+    def estimator(self, name: str, n_rows: int):
+        """
+        The NumPy tree evaluator wins on small batches, where per-call
+        overhead dominates; large batches go to the native estimator.
+        """
+        if n_rows <= COMPILED_TREES_MAX_ROWS and name in self.compiled:
+            return self.compiled[name]
+        return self.estimators[name]
+
+    def predict_proba(self, X: pd.DataFrame, models) -> dict:
+        Xt = self.transform(X)
+        return {name: self.estimator(name, Xt.shape[0]).predict_proba(Xt) for name in models}
+
+    @property
+    def input_columns(self) -> list:
+        return list(self.preprocessor.feature_names_in_)
+
+    @cached_property
+    def row_vectorizer(self):
+        """
+        The preprocessor compiled for JSON records, or None when it cannot be
+        reproduced without pandas.
+        """
+        vectorizer = RowVectorizer.from_preprocessor(self.preprocessor)
+        if vectorizer is None:
+            return None
+        widths = {getattr(est, "n_features_in_", vectorizer.n_features) for est in self.estimators.values()}
+        if widths != {vectorizer.n_features}:
+            return None
+        return vectorizer
+
+    def predict_proba_records(self, records, models) -> dict:
+        Xt = self.row_vectorizer.transform(records)
+        return {name: self.estimator(name, Xt.shape[0]).predict_proba(Xt) for name in models}
+
+
+_fused = {}
+_fused_lock = threading.Lock()
+
+
+def load_compiled(fraud_type: str, model_name: str):
+    """
+    Return the exported tree arrays for a model as a CompiledTrees, or None.
+    """
+    if COMPILED_TREES_MAX_ROWS <= 0:
+        return None
+    try:
+        return registry.get(fraud_type, model_name, ext=TREE_ARRAYS_EXT, loader=CompiledTrees.load)
+    except FileNotFoundError:
+        return None
+
+
+def load_ensemble(fraud_type: str, models):
+    """
+    Return a FusedEnsemble covering `models` for this fraud type, or None.
+
+    The model pipelines are fused when they share a fitted preprocessor:
+    pipelines listed in the `ensemble.joblib` manifest with their current
+    file digest are known to share one from training; others are compared
+    by hash. Exported tree arrays are attached for small-batch scoring.
+    The fused object is rebuilt whenever the registry hands back new artifacts.
+    """
+    try:
+        manifest = registry.get(fraud_type, ENSEMBLE_ARTIFACT).get("models", {})
+    except FileNotFoundError:
+        manifest = {}
+    entries = {name: registry.get_entry(fraud_type, name) for name in models}
+    pipelines = {name: e.model for name, e in entries.items()}
+    sources = list(pipelines.values())
+    versions = {name: e.digest for name, e in entries.items()}
+    compiled = {name: load_compiled(fraud_type, name) for name in models}
+    sources += list(compiled.values())
+
+    key = (fraud_type, tuple(models))
+    with _fused_lock:
+        cached = _fused.get(key)
+    if cached is not None and len(cached[0]) == len(sources) and all(a is b for a, b in zip(cached[0], sources)):
+        return cached[1]
+
+    shared = all(manifest.get(name) == digest for name, digest in versions.items())
+    fused = FusedEnsemble.from_pipelines(pipelines, shared=shared)
+    if fused is not None:
+        fused.compiled = {name: trees for name, trees in compiled.items() if trees is not None}
+        fused.versions = versions
+
+    with _fused_lock:
+        _fused[key] = (sources, fused)
+    return fused
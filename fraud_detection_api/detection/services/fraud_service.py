@@ -1,7 +1,12 @@
+import numpy as np
 import pandas as pd
 from .model_loader import load_model
+from .ensemble import load_ensemble, predictions_from_proba
+from .prediction_cache import prediction_cache, frame_row_keys, record_row_keys
 from . import report_generator as rg
 
+AVAILABLE_MODELS = ["random_forest", "log_reg", "xgboost"]
+
 
 class FraudService:
     def __init__(self, fraud_type: str, model_name: str = "random_forest"):
@@ -10,7 +15,12 @@ class FraudService:
         """
         self.fraud_type = fraud_type
         self.model_name = model_name
-        self.model = load_model(fraud_type, model_name)
+
+    @property
+    def model(self):
+        # Loaded on use only: scoring goes through load_ensemble, which
+        # shares the same registry entries
+        return load_model(self.fraud_type, self.model_name)
 
     def predict(self, df: pd.DataFrame):
         """
@@ -18,12 +28,10 @@ class FraudService:
         Returns:
             tuple -> (summary_dict, dataframe_with_predictions)
         """
-        # Drop label if present
-        X = df.drop(columns=["label"], errors="ignore")
-
-        # Run predictions
-        df["fraud_prediction"] = self.model.predict(X)
-        df["fraud_probability"] = self.model.predict_proba(X)[:, 1]
+        # Run predictions (class derived from the same predict_proba pass)
+        scores = self.predict_many(df)
+        df["fraud_prediction"] = scores[self.model_name].astype(int)
+        df["fraud_probability"] = scores[f"{self.model_name}_probability"]
 
         # Build summary
         summary = {
@@ -36,6 +44,127 @@ class FraudService:
 
         return summary, df
 
+    def predict_many(self, df: pd.DataFrame, models=None) -> pd.DataFrame:
+        """
+        Score a whole frame with several models, one call per model.
+        Rows already in the prediction cache (or repeated within the frame)
+        are not scored again.
+        Returns:
+            DataFrame aligned with df's index holding a boolean `<model>` and
+            a float `<model>_probability` column for every requested model.
+        """
+        models = models or [self.model_name]
+        X = df.drop(columns=["label"], errors="ignore")
+        out = pd.DataFrame(index=df.index)
+
+        # Transform once and share the matrix when the pipelines allow it
+        fused = load_ensemble(self.fraud_type, models)
+        if fused is None:
+            for model_name in models:
+                model = load_model(self.fraud_type, model_name)
+                proba = model.predict_proba(X)
+                out[model_name] = predictions_from_proba(model, proba).astype(bool)
+                out[f"{model_name}_probability"] = proba[:, 1]
+            return out
+
+        def score_rows(idx):
+            rows = X if len(idx) == len(X) else X.iloc[idx]
+            return self._columns(fused, fused.predict_proba(rows, models), len(idx))
+
+        if prediction_cache.enabled:
+            scores = self._cached_scores(fused, frame_row_keys(X, fused.input_columns), models, score_rows)
+        else:
+            scores = score_rows(np.arange(len(X)))
+        for model_name in models:
+            out[model_name], out[f"{model_name}_probability"] = scores[model_name]
+        return out
+
+    def predict_records(self, records, models=None) -> dict:
+        """
+        Score engineered JSON records without building a DataFrame, using the
+        preprocessor compiled into a direct feature-vector builder.
+        Returns:
+            dict -> list of booleans under `<model>` and list of floats under
+            `<model>_probability` for every requested model, in record order.
+        """
+        models = models or [self.model_name]
+        fused = load_ensemble(self.fraud_type, models)
+        if fused is None or fused.row_vectorizer is None:
+            scores = self.predict_many(pd.DataFrame.from_records(records), models=models)
+            return {name: scores[name].tolist() for name in scores.columns}
+
+        def score_rows(idx):
+            rows = [records[i] for i in idx]
+            return self._columns(fused, fused.predict_proba_records(rows, models), len(idx))
+
+        if prediction_cache.enabled:
+            scores = self._cached_scores(fused, record_row_keys(records, fused.input_columns), models, score_rows)
+        else:
+            scores = score_rows(np.arange(len(records)))
+        out = {}
+        for model_name in models:
+            predictions, probabilities = scores[model_name]
+            out[model_name] = predictions.tolist()
+            out[f"{model_name}_probability"] = probabilities.tolist()
+        return out
+
+    @staticmethod
+    def _columns(fused, probas: dict, n_rows: int) -> dict:
+        return {
+            name: (predictions_from_proba(fused.estimator(name, n_rows), proba).astype(bool), proba[:, 1])
+            for name, proba in probas.items()
+        }
+
+    def _cached_scores(self, fused, keys, models, score_rows) -> dict:
+        """
+        Serve rows from the prediction cache and score the rest with
+        score_rows(indices), each distinct row once; fresh scores are cached.
+        Returns:
+            dict -> model_name: (bool predictions, positive-class probabilities)
+        """
+        versions = {name: fused.versions.get(name, "")[:16] for name in models}
+        found = {
+            name: prediction_cache.get_many([(self.fraud_type, name, versions[name], key) for key in keys])
+            for name in models
+        }
+
+        # First occurrence of every row some model still has to score
+        pending = {}
+        for i, key in enumerate(keys):
+            if key not in pending and any(found[name][i] is None for name in models):
+                pending[key] = i
+        if pending:
+            scored = score_rows(np.fromiter(pending.values(), dtype=np.intp, count=len(pending)))
+            for name in models:
+                predictions, probabilities = scored[name]
+                fresh = dict(zip(pending, zip(predictions.tolist(), probabilities.tolist())))
+                prediction_cache.put_many(
+                    ((self.fraud_type, name, versions[name], key), value) for key, value in fresh.items()
+                )
+                found[name] = [fresh[key] if value is None else value for key, value in zip(keys, found[name])]
+
+        return {
+            name: (
+                np.array([value[0] for value in found[name]], dtype=bool),
+                np.array([value[1] for value in found[name]], dtype=np.float64),
+            )
+            for name in models
+        }
+
+    def analyze(self, chunks, view_types) -> dict:
+        """
+        Score an iterable of frames one at a time into a single running
+        report, then build every requested view from it (one scoring pass
+        however many views are asked for; memory does not grow with rows).
+        Returns:
+            dict -> view_type: report
+        """
+        report = rg.ReportAccumulator()
+        for chunk in chunks:
+            scores = self.predict_many(chunk)
+            report.add(scores[self.model_name].to_numpy(), scores[f"{self.model_name}_probability"].to_numpy())
+        return {view_type: report.report(view_type, self.fraud_type, self.model_name) for view_type in view_types}
+
     def generate_report(self, df: pd.DataFrame, view_type: str):
         """
         Generate reports based on requested view_type.
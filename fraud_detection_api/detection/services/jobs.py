@@ -0,0 +1,195 @@
+import os
+import json
+import socket
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+import pandas as pd
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from detection.models import ScoringJob
+from detection.utils import UPLOAD_CHUNK_ROWS
+from .upload_scoring import process_upload
+
+JOB_DIR = str(getattr(settings, "FRAUD_JOB_DIR", os.path.join(settings.BASE_DIR, "var", "jobs")))
+JOB_WORKERS = getattr(settings, "FRAUD_JOB_WORKERS", 2)
+
+# Jobs a live job pool may still be working on
+ACTIVE_STATUSES = ("QUEUED", "RUNNING")
+ORPHANED_ERROR = "Interrupted: the server process running the job exited; resubmit the file"
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ProcessPoolExecutor:
+    """
+    Lazily start the local job pool. Workers are spawned (not forked) so they
+    never share the web process' database connections, and each one runs
+    django.setup() before picking up a job.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=JOB_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=django.setup,
+            )
+        return _executor
+
+
+def submit_job(file_obj, fraud_type: str, merchant_name=None) -> ScoringJob:
+    """
+    Store the upload on disk, create the job row and queue it for scoring.
+    """
+    job = ScoringJob(fraud_type=fraud_type, merchant_name=merchant_name, owner=process_owner())
+    job_dir = os.path.join(JOB_DIR, str(job.id))
+    os.makedirs(job_dir, exist_ok=True)
+    job.input_path = os.path.join(job_dir, "input.csv")
+    job.result_path = os.path.join(job_dir, "results.ndjson")
+
+    with open(job.input_path, "wb") as fh:
+        for block in file_obj.chunks():
+            fh.write(block)
+    job.save()
+
+    future = get_executor().submit(run_scoring_job, str(job.id))
+    future.add_done_callback(lambda f, job_id=job.id: _on_job_done(job_id, f))
+    return job
+
+
+def _on_job_done(job_id, future):
+    # A crashed worker never reaches its own error handling
+    exc = future.exception()
+    if exc is not None:
+        logger.error("Scoring job %s failed: %s", job_id, exc)
+        ScoringJob.objects.filter(pk=job_id).exclude(status="FAILED").update(
+            status="FAILED", error=str(exc), finished_at=timezone.now()
+        )
+
+
+def process_owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _orphaned(owner) -> bool:
+    # Jobs from before owners were recorded have no owner and no live pool
+    if owner is None:
+        return True
+    host, _, pid = owner.rpartition(":")
+    return host == socket.gethostname() and not _process_alive(int(pid))
+
+
+def _fail_jobs(job_ids) -> int:
+    return ScoringJob.objects.filter(pk__in=job_ids, status__in=ACTIVE_STATUSES).update(
+        status="FAILED", error=ORPHANED_ERROR, finished_at=timezone.now()
+    )
+
+
+def fail_orphaned_jobs() -> int:
+    """
+    Mark this host's QUEUED and RUNNING jobs FAILED when the web process
+    that owned their job pool is gone (restarted, recycled or killed): the
+    pool died with it, so they would never finish. The upload can be
+    resubmitted. Jobs of live processes, such as sibling server workers,
+    are left alone.
+    """
+    orphaned = [
+        job_id
+        for job_id, owner in ScoringJob.objects.filter(status__in=ACTIVE_STATUSES).values_list("id", "owner")
+        if _orphaned(owner)
+    ]
+    failed = _fail_jobs(orphaned) if orphaned else 0
+    if failed:
+        logger.warning("Marked %d interrupted scoring jobs failed", failed)
+    return failed
+
+
+def check_orphaned(job: ScoringJob) -> ScoringJob:
+    """
+    Fail a QUEUED or RUNNING job whose owning process is gone, as its status
+    is read, so a recycled worker's jobs do not stay RUNNING forever.
+    """
+    if job.status in ACTIVE_STATUSES and _orphaned(job.owner) and _fail_jobs([job.pk]):
+        logger.warning("Marked interrupted scoring job %s failed", job.pk)
+        job.refresh_from_db()
+    return job
+
+
+def count_rows(path: str) -> int:
+    return sum(len(chunk) for chunk in pd.read_csv(path, usecols=[0], chunksize=UPLOAD_CHUNK_ROWS))
+
+
+def run_scoring_job(job_id: str):
+    """
+    Worker entry point: score the stored upload chunk by chunk, append the
+    response records to the NDJSON result file and record progress.
+    """
+    job = ScoringJob.objects.get(pk=job_id)
+    ScoringJob.objects.filter(pk=job_id).update(
+        status="RUNNING", started_at=timezone.now(), rows_total=count_rows(job.input_path)
+    )
+    try:
+        with open(job.input_path, "rb") as src, open(job.result_path, "w") as out:
+            for responses in process_upload(src, job.fraud_type, job.merchant_name):
+                for record in responses:
+                    out.write(json.dumps(record, default=str) + "\n")
+                out.flush()
+                ScoringJob.objects.filter(pk=job_id).update(rows_done=F("rows_done") + len(responses))
+    except Exception as exc:
+        logger.exception("Scoring job %s failed", job_id)
+        ScoringJob.objects.filter(pk=job_id).update(
+            status="FAILED", error=str(exc), finished_at=timezone.now()
+        )
+        return
+
+    ScoringJob.objects.filter(pk=job_id).update(status="DONE", finished_at=timezone.now())
+
+
+def read_results(job: ScoringJob, cursor: int, limit: int):
+    """
+    Return up to `limit` response records from the job's result file
+    (records already written while the job is running), starting at byte
+    `cursor`, so each page seeks straight to its first record.
+    Returns:
+        (list, int, bool) -> records, cursor of the next page, and whether
+        the file holds more records after them
+    Raises:
+        ValueError -> cursor is not the start of a record
+    """
+    results = []
+    if not os.path.exists(job.result_path):
+        if cursor:
+            raise ValueError("cursor is past the end of the results")
+        return results, cursor, False
+    with open(job.result_path, "rb") as fh:
+        if cursor:
+            fh.seek(cursor - 1)
+            if fh.read(1) != b"\n":
+                raise ValueError("cursor is not the start of a record")
+        while len(results) < limit:
+            line = fh.readline()
+            # A partial last line is still being written
+            if not line.endswith(b"\n"):
+                return results, cursor, False
+            results.append(json.loads(line))
+            cursor += len(line)
+        return results, cursor, fh.readline().endswith(b"\n")
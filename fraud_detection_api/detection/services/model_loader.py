@@ -1,18 +1,161 @@
 import os
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
 import joblib
 from django.conf import settings
 
 ML_BASE_DIR = os.path.abspath(os.path.join(settings.BASE_DIR, "..", "experiments"))
 
+# Upper bound for the artifacts kept in memory, measured by their size on disk.
+MODEL_CACHE_MAX_BYTES = getattr(settings, "FRAUD_MODEL_CACHE_MAX_BYTES", 2 * 1024 ** 3)
+
+logger = logging.getLogger(__name__)
+
+
+def file_digest(path: str) -> str:
+    sha = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1024 * 1024), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+@dataclass
+class ModelEntry:
+    model: Any
+    path: str
+    mtime_ns: int
+    size: int
+    digest: str
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of fitted pipelines keyed by (fraud_type, model_name).
+
+    Each artifact is unpickled once and reused until its file changes: the
+    mtime/size pair is checked on every lookup and the file is only re-hashed
+    (and reloaded if the hash differs) when that pair moves. Entries are kept
+    in LRU order and evicted once their combined on-disk size exceeds max_bytes.
+    """
+
+    def __init__(self, base_dir: str = ML_BASE_DIR, max_bytes: int = MODEL_CACHE_MAX_BYTES):
+        self.base_dir = base_dir
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._key_locks = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self.evictions = 0
+
+    def _path(self, fraud_type: str, artifact: str) -> str:
+        return os.path.join(self.base_dir, fraud_type, "models", artifact)
+
+    def _lookup(self, key, stat):
+        """Return the cached entry if it still matches the file on disk (caller holds the lock)."""
+        entry = self._entries.get(key)
+        if entry is not None and entry.mtime_ns == stat.st_mtime_ns and entry.size == stat.st_size:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+        return None
+
+    def get_entry(self, fraud_type: str, model_name: str, ext: str = ".joblib", loader=joblib.load) -> ModelEntry:
+        """
+        Return the cached entry for `<model_name><ext>`, loading it with
+        `loader` on a miss. Non-joblib artifacts (e.g. exported tree arrays)
+        share the same cache, LRU budget and reload rules.
+        """
+        artifact = f"{model_name}{ext}"
+        path = self._path(fraud_type, artifact)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Model not found: {path}")
+
+        key = (fraud_type, artifact)
+        with self._lock:
+            entry = self._lookup(key, stat)
+            if entry is not None:
+                return entry
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # Load outside the registry lock so one slow unpickle does not block
+        # lookups for other models; the per-key lock stops duplicate loads.
+        with key_lock:
+            with self._lock:
+                entry = self._lookup(key, stat)
+                if entry is not None:
+                    return entry
+                stale = self._entries.get(key)
+
+            digest = file_digest(path)
+            if stale is not None and stale.digest == digest:
+                # Touched but unchanged: keep the loaded model.
+                with self._lock:
+                    stale.mtime_ns, stale.size = stat.st_mtime_ns, stat.st_size
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                return stale
+
+            model = loader(path)
+            entry = ModelEntry(model, path, stat.st_mtime_ns, stat.st_size, digest)
+            with self._lock:
+                self.misses += 1
+                if stale is not None:
+                    self.reloads += 1
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                self._evict(keep=key)
+            logger.info("Loaded model %s/%s (%d bytes)", fraud_type, artifact, stat.st_size)
+            return entry
+
+    def get(self, fraud_type: str, model_name: str, ext: str = ".joblib", loader=joblib.load):
+        return self.get_entry(fraud_type, model_name, ext, loader).model
+
+    def _evict(self, keep):
+        total = sum(e.size for e in self._entries.values())
+        while total > self.max_bytes and len(self._entries) > 1:
+            key, entry = next(iter(self._entries.items()))
+            if key == keep:
+                break
+            del self._entries[key]
+            total -= entry.size
+            self.evictions += 1
+            logger.info("Evicted model %s/%s from cache", *key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "reloads": self.reloads,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "cached_models": [f"{ft}/{name}" for ft, name in self._entries],
+                "cached_bytes": sum(e.size for e in self._entries.values()),
+                "max_bytes": self.max_bytes,
+            }
+
+
+registry = ModelRegistry()
+
+
 def load_model(fraud_type: str, model_name: str):
-    model_path = os.path.join(
-        ML_BASE_DIR,
-        fraud_type,
-        "models",
-        f"{model_name}.joblib"
-    )
+    return registry.get(fraud_type, model_name)
 
-    if not os.path.exists(model_path):
-        raise FileNotFoundError(f"Model not found: {model_path}")
 
-    return joblib.load(model_path)
+def cache_stats() -> dict:
+    return registry.stats()
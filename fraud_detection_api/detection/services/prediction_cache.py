@@ -0,0 +1,135 @@
+import math
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+# Bounded by entry count (one entry per row and model); 0 disables the cache
+PREDICTION_CACHE_MAX_ENTRIES = getattr(settings, "FRAUD_PREDICTION_CACHE_MAX_ENTRIES", 100_000)
+PREDICTION_CACHE_TTL_SECONDS = getattr(settings, "FRAUD_PREDICTION_CACHE_TTL_SECONDS", 3600)
+
+
+def _normalize(value):
+    """
+    Canonical form of one input value: missing -> None, numbers -> float,
+    anything else -> str, so 1 and 1.0 (or "" and NaN) share a key just as
+    the preprocessor treats them the same.
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, (bool, int, float, np.number)):
+        value = float(value)
+        return None if math.isnan(value) else value
+    return str(value)
+
+
+def _digest(row: tuple) -> bytes:
+    return hashlib.blake2b(repr(row).encode(), digest_size=16).digest()
+
+
+def frame_row_keys(X: pd.DataFrame, columns) -> list:
+    """
+    Stable 128-bit key per row over the preprocessor's input columns only,
+    so ids, labels and other passthrough fields do not defeat the cache.
+    """
+    normalized = []
+    for column in columns:
+        series = X[column]
+        if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            values = series.to_numpy(dtype=np.float64).tolist()
+            normalized.append([None if v != v else v for v in values])
+        else:
+            normalized.append([_normalize(v) for v in series.tolist()])
+    return [_digest(row) for row in zip(*normalized)]
+
+
+def record_row_keys(records, columns) -> list:
+    """
+    Same keys as frame_row_keys for JSON records (absent fields are missing).
+    """
+    return [_digest(tuple(_normalize(record.get(column)) for column in columns)) for record in records]
+
+
+class PredictionCache:
+    """
+    In-process LRU cache of per-row model outputs with a TTL.
+
+    Keys are (fraud_type, model_name, model_digest, row_key): the model's
+    artifact digest makes a retrained model miss instead of serving stale
+    scores. Values are (prediction, probability) pairs.
+    """
+
+    def __init__(self, max_entries: int = PREDICTION_CACHE_MAX_ENTRIES, ttl: float = PREDICTION_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def get_many(self, keys) -> list:
+        """
+        Look up several keys under one lock; returns the value or None for each.
+        """
+        now = time.monotonic()
+        found = []
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] < now:
+                    del self._entries[key]
+                    self.expirations += 1
+                    entry = None
+                if entry is None:
+                    self.misses += 1
+                    found.append(None)
+                else:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    found.append(entry[1])
+        return found
+
+    def put_many(self, items):
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            for key, value in items:
+                self._entries[key] = (expires, value)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+            }
+
+
+prediction_cache = PredictionCache()
+
+
+def prediction_cache_stats() -> dict:
+    return prediction_cache.stats()
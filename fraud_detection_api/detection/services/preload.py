@@ -0,0 +1,53 @@
+import gc
+import os
+import logging
+from .model_loader import registry
+from .ensemble import load_ensemble
+from .fraud_service import AVAILABLE_MODELS
+
+logger = logging.getLogger(__name__)
+
+
+def preload_models(fraud_types=None) -> list:
+    """
+    Load the artifacts the serving path reads (the ensemble manifest, the
+    AVAILABLE_MODELS pipelines and their exported tree arrays) into the
+    registry and build the fused ensembles, so nothing is unpickled later.
+    Other files in the models directories are left on disk.
+    Returns:
+        list -> "fraud_type/artifact" names that were loaded
+    """
+    if fraud_types is None:
+        fraud_types = sorted(
+            d for d in os.listdir(registry.base_dir)
+            if os.path.isdir(os.path.join(registry.base_dir, d, "models"))
+        )
+
+    for fraud_type in fraud_types:
+        try:
+            load_ensemble(fraud_type, AVAILABLE_MODELS)
+        except Exception:
+            # A broken artifact fails its own requests, not server start-up
+            logger.exception("Could not preload models for %s", fraud_type)
+
+    loaded = [name for name in registry.stats()["cached_models"] if name.split("/", 1)[0] in fraud_types]
+    if registry.evictions:
+        logger.warning("Model cache evicted %d artifacts while preloading; "
+                       "raise FRAUD_MODEL_CACHE_MAX_BYTES", registry.evictions)
+    return loaded
+
+
+def preload_for_fork():
+    """
+    Preload models in the parent process of a pre-forking server.
+
+    Workers forked afterwards share the model pages copy-on-write instead of
+    each unpickling a private copy. gc.freeze() moves the loaded objects into
+    the permanent generation, so the workers' garbage collector does not
+    write to (and thereby copy) the pages holding them.
+    """
+    loaded = preload_models()
+    gc.collect()
+    gc.freeze()
+    logger.info("Preloaded %d model artifacts before fork", len(loaded))
+    return loaded
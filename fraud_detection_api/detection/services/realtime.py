@@ -0,0 +1,34 @@
+from django.conf import settings
+from detection import features as fe
+from .fraud_service import FraudService, AVAILABLE_MODELS
+from .coalescer import get_coalescer, COALESCE_WINDOW_MS
+
+# Largest JSON array accepted by the real-time score endpoint
+SCORE_MAX_ROWS = getattr(settings, "FRAUD_SCORE_MAX_ROWS", 100)
+
+
+def score_records(fraud_type: str, records) -> list:
+    """
+    Score JSON transactions with every model for inline decisions.
+    Nothing is saved; RandomForest is the base model for the flag, as on upload.
+    Concurrent calls are micro-batched by the coalescer unless its window is 0.
+    Returns:
+        list -> one response dict per record, in input order
+    """
+    records = [fe.engineer_record(record) for record in records]
+    if COALESCE_WINDOW_MS > 0:
+        columns = get_coalescer(fraud_type).submit(records)
+    else:
+        columns = FraudService(fraud_type).predict_records(records, models=AVAILABLE_MODELS)
+
+    responses = []
+    for i in range(len(records)):
+        response_record = {"fraud_type": fraud_type}
+        for model_name in AVAILABLE_MODELS:
+            response_record[model_name] = {
+                "status": columns[model_name][i],
+                "probability": columns[f"{model_name}_probability"][i],
+            }
+        response_record["flag"] = columns["random_forest"][i]
+        responses.append(response_record)
+    return responses
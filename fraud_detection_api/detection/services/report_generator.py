@@ -1,45 +1,173 @@
+import numpy as np
 import pandas as pd
 
+VIEW_TYPES = ("summary", "breakdown", "probabilities")
+
+# Equal-width bins over [0, 1] in the probabilities histogram
+HISTOGRAM_BINS = 20
+QUANTILES = (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99)
+# Cells of the quantile sketch; quantiles are within half a cell (5e-5) of exact
+SKETCH_RESOLUTION = 10000
+
+
+class ProbabilitySketch:
+    """
+    Mergeable streaming sketch of probabilities in [0, 1]: counts per cell
+    of a fixed grid. Memory does not grow with the number of rows, ranks
+    are exact and values are off by at most half a cell, and two sketches
+    merge by adding their counts (e.g. per-chunk or per-worker sketches).
+    """
+
+    def __init__(self, resolution: int = SKETCH_RESOLUTION):
+        self.resolution = resolution
+        self.counts = np.zeros(resolution, dtype=np.int64)
+
+    def add(self, probabilities: np.ndarray):
+        cells = np.clip((probabilities * self.resolution).astype(np.intp), 0, self.resolution - 1)
+        self.counts += np.bincount(cells, minlength=self.resolution)
+
+    def merge(self, other: "ProbabilitySketch"):
+        self.counts += other.counts
+
+    def quantiles(self, qs) -> list:
+        """
+        Midpoints of the cells holding the ceil(q * n)-th smallest value.
+        """
+        cumulative = np.cumsum(self.counts)
+        total = int(cumulative[-1])
+        if not total:
+            return [None] * len(qs)
+        ranks = np.maximum(np.ceil(np.asarray(qs) * total), 1)
+        cells = np.searchsorted(cumulative, ranks)
+        return ((cells + 0.5) / self.resolution).tolist()
+
+
+class ReportAccumulator:
+    """
+    Running totals behind every view_type, fed one scored chunk at a time
+    so a report never needs the whole file in memory.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.fraudulent = 0
+        self.probability_sum = 0.0
+        self.min_probability = np.inf
+        self.max_probability = -np.inf
+        self.histogram = np.zeros(HISTOGRAM_BINS, dtype=np.int64)
+        self.sketch = ProbabilitySketch()
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "ReportAccumulator":
+        report = cls()
+        report.add(df["fraud_prediction"].to_numpy(), df["fraud_probability"].to_numpy())
+        return report
+
+    def add(self, predictions: np.ndarray, probabilities: np.ndarray):
+        if not len(probabilities):
+            return
+        probabilities = np.asarray(probabilities, dtype=np.float64)
+        self.total += len(probabilities)
+        self.fraudulent += int(np.count_nonzero(predictions))
+        self.probability_sum += float(probabilities.sum())
+        self.min_probability = min(self.min_probability, float(probabilities.min()))
+        self.max_probability = max(self.max_probability, float(probabilities.max()))
+        self.histogram += np.histogram(probabilities, bins=HISTOGRAM_BINS, range=(0.0, 1.0))[0]
+        self.sketch.add(probabilities)
+
+    def merge(self, other: "ReportAccumulator"):
+        self.total += other.total
+        self.fraudulent += other.fraudulent
+        self.probability_sum += other.probability_sum
+        self.min_probability = min(self.min_probability, other.min_probability)
+        self.max_probability = max(self.max_probability, other.max_probability)
+        self.histogram += other.histogram
+        self.sketch.merge(other.sketch)
+
+    def _rounded(self, value):
+        return round(value, 3) if self.total else None
+
+    def summary(self, fraud_type: str, model_name: str) -> dict:
+        return {
+            "fraud_type": fraud_type,
+            "model_used": model_name,
+            "total_records": self.total,
+            "fraudulent_cases": self.fraudulent,
+            "fraud_rate": self._rounded(self.fraudulent / self.total if self.total else 0.0),
+        }
+
+    def breakdown(self, fraud_type: str) -> dict:
+        return {
+            "fraud_type": fraud_type,
+            "breakdown": {
+                "non_fraud": self.total - self.fraudulent,
+                "fraud": self.fraudulent,
+            }
+        }
+
+    def probabilities(self) -> dict:
+        # Clip to the observed min/max, which are tracked exactly
+        quantiles = [
+            None if value is None else min(max(value, self.min_probability), self.max_probability)
+            for value in self.sketch.quantiles(QUANTILES)
+        ]
+        return {
+            "probability_distribution": {
+                "average_probability": self._rounded(self.probability_sum / self.total if self.total else 0.0),
+                "max_probability": self._rounded(self.max_probability),
+                "min_probability": self._rounded(self.min_probability),
+                "quantiles": {
+                    f"p{round(q * 100)}": None if value is None else round(value, 3)
+                    for q, value in zip(QUANTILES, quantiles)
+                },
+                "histogram": {
+                    "bin_edges": [round(i / HISTOGRAM_BINS, 4) for i in range(HISTOGRAM_BINS + 1)],
+                    "counts": self.histogram.tolist(),
+                },
+            }
+        }
+
+    def report(self, view_type: str, fraud_type: str, model_name: str) -> dict:
+        if view_type == "summary":
+            return self.summary(fraud_type, model_name)
+        elif view_type == "breakdown":
+            return self.breakdown(fraud_type)
+        elif view_type == "probabilities":
+            return self.probabilities()
+        else:
+            raise ValueError(f"Unsupported view_type: {view_type}")
+
+
+def parse_view_types(view_type: str) -> list:
+    """
+    Comma-separated view types ("summary,probabilities"), or "all".
+    """
+    if view_type == "all":
+        return list(VIEW_TYPES)
+    view_types = list(dict.fromkeys(name.strip() for name in view_type.split(",") if name.strip()))
+    unknown = [name for name in view_types if name not in VIEW_TYPES]
+    if unknown or not view_types:
+        raise ValueError(f"Unsupported view_type: {view_type}")
+    return view_types
+
 
 def generate_summary(fraud_type: str, model_name: str, df: pd.DataFrame) -> dict:
     """
     Returns high-level summary stats.
     """
-    return {
-        "fraud_type": fraud_type,
-        "model_used": model_name,
-        "total_records": len(df),
-        "fraudulent_cases": int(df['fraud_prediction'].sum()),
-        "fraud_rate": round(float(df['fraud_prediction'].mean()), 3),
-    }
+    return ReportAccumulator.from_frame(df).summary(fraud_type, model_name)
 
 
 def generate_breakdown(fraud_type: str, df: pd.DataFrame) -> dict:
     """
     Returns breakdown counts for fraud vs non-fraud.
     """
-    counts = df['fraud_prediction'].value_counts().to_dict()
-    return {
-        "fraud_type": fraud_type,
-        "breakdown": {
-            "non_fraud": int(counts.get(0, 0)),
-            "fraud": int(counts.get(1, 0)),
-        }
-    }
+    return ReportAccumulator.from_frame(df).breakdown(fraud_type)
 
 
 def generate_probabilities(df: pd.DataFrame) -> dict:
     """
-    Returns fraud probability distribution (basic).
+    Returns fraud probability distribution: mean/min/max, quantiles and a
+    fixed-bin histogram.
     """
-    avg_prob = float(df['fraud_probability'].mean())
-    max_prob = float(df['fraud_probability'].max())
-    min_prob = float(df['fraud_probability'].min())
-
-    return {
-        "probability_distribution": {
-            "average_probability": round(avg_prob, 3),
-            "max_probability": round(max_prob, 3),
-            "min_probability": round(min_prob, 3),
-        }
-    }
\ No newline at end of file
+    return ReportAccumulator.from_frame(df).probabilities()
@@ -0,0 +1,72 @@
+from collections import defaultdict
+from django.db.models import Count, F, FloatField, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+from detection.models import FraudDailyRollup
+from .fraud_service import AVAILABLE_MODELS
+
+COUNT_FIELDS = ("total", "fraudulent", "non_fraudulent")
+PROBABILITY_SUM_FIELDS = tuple(f"{model_name}_probability_sum" for model_name in AVAILABLE_MODELS)
+
+
+def _rollup_key(prediction) -> tuple:
+    # merchant_name is stored as "" for missing merchants so the unique key holds
+    return (prediction.merchant_name or "", prediction.fraud_type, timezone.localdate(prediction.created_at))
+
+
+def add_to_rollups(predictions):
+    """
+    Add freshly saved FraudPrediction rows to their daily rollups. Call it in
+    the same transaction as the bulk_create, so counts and rows commit together.
+    Missing keys are inserted with zero counts (conflicts ignored, so a
+    concurrent upload creating the same key is not an error), then every
+    key gets one F() increment. Keys are handled in sorted order so
+    concurrent uploads lock rollup rows in the same order.
+    """
+    deltas = defaultdict(lambda: dict.fromkeys(COUNT_FIELDS + PROBABILITY_SUM_FIELDS, 0))
+    for prediction in predictions:
+        delta = deltas[_rollup_key(prediction)]
+        delta["total"] += 1
+        delta["fraudulent" if prediction.status else "non_fraudulent"] += 1
+        for model_name in AVAILABLE_MODELS:
+            delta[f"{model_name}_probability_sum"] += getattr(prediction, f"{model_name}_probability") or 0.0
+
+    keys = sorted(deltas)
+    FraudDailyRollup.objects.bulk_create(
+        [FraudDailyRollup(merchant_name=merchant_name, fraud_type=fraud_type, day=day)
+         for merchant_name, fraud_type, day in keys],
+        ignore_conflicts=True,
+    )
+    for merchant_name, fraud_type, day in keys:
+        increments = {field: F(field) + value for field, value in deltas[(merchant_name, fraud_type, day)].items()}
+        FraudDailyRollup.objects.filter(merchant_name=merchant_name, fraud_type=fraud_type, day=day).update(**increments)
+
+
+def aggregate_predictions(queryset) -> list:
+    """
+    Recompute daily rollups from prediction rows with one GROUP BY.
+    Returns:
+        list -> unsaved FraudDailyRollup objects
+    """
+    sums = {
+        f"{model_name}_probability_sum": Coalesce(
+            Sum(f"{model_name}_probability"), Value(0.0), output_field=FloatField()
+        )
+        for model_name in AVAILABLE_MODELS
+    }
+    rows = (
+        queryset
+        .annotate(rollup_merchant=Coalesce("merchant_name", Value("")), day=TruncDate("created_at"))
+        .values("rollup_merchant", "fraud_type", "day")
+        .annotate(
+            total=Count("id"),
+            fraudulent=Count("id", filter=Q(status=True)),
+            non_fraudulent=Count("id", filter=Q(status=False)),
+            **sums,
+        )
+        .order_by()
+    )
+    return [
+        FraudDailyRollup(merchant_name=row.pop("rollup_merchant"), **row)
+        for row in rows
+    ]
@@ -0,0 +1,198 @@
+import math
+import numpy as np
+from scipy import sparse
+from sklearn.compose import ColumnTransformer
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.impute import SimpleImputer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+
+def _is_missing(value) -> bool:
+    # Empty strings are missing too, as pd.read_csv would read them
+    return value is None or value == "" or (isinstance(value, float) and math.isnan(value))
+
+
+def _to_float(value) -> float:
+    if _is_missing(value):
+        return np.nan
+    return float(value)
+
+
+class _NumericBlock:
+    """Median/mean imputation followed by standard scaling."""
+
+    def __init__(self, columns, fill, mean, scale):
+        self.columns = list(columns)
+        self.width = len(self.columns)
+        self.fill = fill
+        self.mean = mean
+        self.scale = scale
+
+    def entries(self, record: dict):
+        values = np.array([_to_float(record.get(c)) for c in self.columns], dtype=np.float64)
+        missing = np.isnan(values)
+        if missing.any():
+            values[missing] = self.fill[missing]
+        if self.mean is not None:
+            values -= self.mean
+        if self.scale is not None:
+            values /= self.scale
+        indices = np.flatnonzero(values)
+        return indices, values[indices]
+
+
+class _OneHotBlock:
+    """Most-frequent imputation followed by one-hot encoding (unknowns ignored)."""
+
+    def __init__(self, columns, fill, categories):
+        self.columns = list(columns)
+        self.fill = list(fill)
+        self.lookups = []
+        offset = 0
+        for cats in categories:
+            self.lookups.append({cat: offset + i for i, cat in enumerate(cats.tolist())})
+            offset += len(cats)
+        self.width = offset
+
+    def entries(self, record: dict):
+        indices = []
+        for column, fill, lookup in zip(self.columns, self.fill, self.lookups):
+            value = record.get(column)
+            if _is_missing(value):
+                value = fill
+            index = lookup.get(value)
+            if index is None:
+                index = lookup.get(str(value))
+            if index is not None:
+                indices.append(index)
+        return np.array(indices, dtype=np.intp), np.ones(len(indices))
+
+
+class _TextBlock:
+    """A fitted TF-IDF vectorizer over one text column."""
+
+    def __init__(self, column, vectorizer):
+        self.column = column
+        self.vectorizer = vectorizer
+        self.width = len(vectorizer.vocabulary_)
+
+    def entries(self, record: dict):
+        value = record.get(self.column)
+        row = self.vectorizer.transform(["" if _is_missing(value) else str(value)])
+        return row.indices, row.data
+
+
+def _numeric_block(columns, steps):
+    fill = mean = scale = None
+    for step in steps:
+        if isinstance(step, SimpleImputer) and step.strategy in ("mean", "median", "constant"):
+            if np.isnan(step.statistics_.astype(np.float64)).any():
+                # All-NaN training columns are dropped by the imputer
+                return None
+            fill = step.statistics_.astype(np.float64)
+        elif isinstance(step, StandardScaler) and fill is not None:
+            # mean_ is fitted even when with_mean=False, but not subtracted then
+            mean = step.mean_ if step.with_mean else None
+            scale = step.scale_ if step.with_std else None
+        else:
+            return None
+    if fill is None:
+        return None
+    return _NumericBlock(columns, fill, mean, scale)
+
+
+def _categorical_block(columns, steps):
+    if len(steps) != 2:
+        return None
+    imputer, encoder = steps
+    if not (isinstance(imputer, SimpleImputer) and isinstance(encoder, OneHotEncoder)):
+        return None
+    if encoder.drop_idx_ is not None or encoder.min_frequency is not None or encoder.max_categories is not None:
+        return None
+    if encoder.handle_unknown != "ignore":
+        return None
+    return _OneHotBlock(columns, imputer.statistics_, encoder.categories_)
+
+
+class RowVectorizer:
+    """
+    Builds the fitted ColumnTransformer's feature matrix straight from JSON
+    records, without a DataFrame.
+
+    Each transformer of the fitted preprocessor is compiled into a block that
+    returns the non-zero entries of its slice of a row: imputation constants,
+    scaler mean/scale, one-hot offsets per category and the TF-IDF vocabulary
+    are all read from the fitted objects, so the output matches
+    preprocessor.transform.
+    Fields missing from a record are treated as missing values and imputed.
+    """
+
+    def __init__(self, blocks, sparse_output: bool):
+        self.blocks = blocks
+        self.sparse_output = sparse_output
+        self.n_features = sum(block.width for block in blocks)
+
+    @classmethod
+    def from_preprocessor(cls, preprocessor):
+        """
+        Compile a fitted ColumnTransformer, or return None when it uses a step
+        this builder does not reproduce (callers then fall back to pandas).
+        """
+        if not isinstance(preprocessor, ColumnTransformer):
+            return None
+        blocks = []
+        for name, transformer, columns in preprocessor.transformers_:
+            if transformer == "drop":
+                continue
+            if name == "remainder" or transformer == "passthrough":
+                return None
+            steps = [step for _, step in transformer.steps] if isinstance(transformer, Pipeline) else [transformer]
+            if isinstance(steps[0], TfidfVectorizer) and len(steps) == 1 and isinstance(columns, str):
+                block = _TextBlock(columns, steps[0])
+            elif isinstance(steps[0], SimpleImputer) and isinstance(steps[-1], OneHotEncoder):
+                block = _categorical_block(columns, steps)
+            else:
+                block = _numeric_block(columns, steps)
+            if block is None:
+                return None
+            blocks.append(block)
+        return cls(blocks, bool(preprocessor.sparse_output_))
+
+    def transform(self, records):
+        """
+        Return the (n_records, n_features) feature matrix, sparse when the
+        fitted ColumnTransformer produces sparse output.
+        """
+        if not self.sparse_output:
+            out = np.zeros((len(records), self.n_features), dtype=np.float64)
+            for i, record in enumerate(records):
+                offset = 0
+                for block in self.blocks:
+                    indices, data = block.entries(record)
+                    out[i, offset + indices] = data
+                    offset += block.width
+            return out
+
+        # Sparse output is assembled from the non-zero entries, never densified
+        indptr = np.zeros(len(records) + 1, dtype=np.int64)
+        indices, data = [], []
+        for i, record in enumerate(records):
+            offset = 0
+            for block in self.blocks:
+                block_indices, block_data = block.entries(record)
+                indices.append(block_indices + offset)
+                data.append(block_data)
+                indptr[i + 1] += len(block_indices)
+                offset += block.width
+        np.cumsum(indptr, out=indptr)
+        out = sparse.csr_matrix(
+            (
+                np.concatenate(data) if data else np.zeros(0),
+                np.concatenate(indices) if indices else np.zeros(0, dtype=np.intp),
+                indptr,
+            ),
+            shape=(len(records), self.n_features),
+        )
+        out.sort_indices()
+        return out
@@ -0,0 +1,119 @@
+import numpy as np
+from scipy import sparse
+
+TREE_ARRAYS_EXT = ".trees.npz"
+
+# Rows scored per traversal block (bounds the rows x trees node matrix)
+BLOCK_ROWS = 2048
+
+
+class CompiledTrees:
+    """
+    Vectorized NumPy evaluator for the flat node arrays written by
+    src.train.export_tree_arrays.
+
+    Drop-in for the final estimator of a pipeline: it takes the transformed
+    feature matrix and exposes predict_proba and classes_. All trees are
+    walked together, one level per step, over the (row, tree) pairs that
+    have not reached a leaf yet.
+    """
+
+    def __init__(self, arrays: dict):
+        self.kind = str(arrays["kind"])
+        self.classes_ = arrays["classes"]
+        self.roots = arrays["roots"].astype(np.intp)
+        self.threshold = arrays["threshold"]
+        self.missing_left = arrays["missing_left"].astype(bool)
+        self.value = arrays["value"]
+        self.base_margin = arrays["base_margin"] if "base_margin" in arrays else None
+
+        # Leaves point to themselves; children[2 * node + go_left] holds the
+        # right child at even and the left child at odd slots
+        left = arrays["left"].astype(np.intp)
+        right = arrays["right"].astype(np.intp)
+        self.is_leaf = left == np.arange(len(left))
+        self.children = np.column_stack([right, left]).ravel()
+
+        # Only densify the columns some split actually uses
+        self.used_features, feature = np.unique(arrays["feature"], return_inverse=True)
+        self.feature = feature.astype(np.intp)
+
+    @classmethod
+    def load(cls, path: str):
+        with np.load(path) as data:
+            return cls({key: data[key] for key in data.files})
+
+    def _dense(self, X) -> np.ndarray:
+        """
+        Used feature columns as float32. For XGBoost, entries not stored in a
+        sparse matrix are missing (NaN), as in a DMatrix built from CSR.
+        """
+        if sparse.issparse(X):
+            X = sparse.csr_matrix(X)[:, self.used_features]
+            if self.kind != "xgboost":
+                return X.toarray().astype(np.float32)
+            dense = np.full(X.shape, np.nan, dtype=np.float32)
+            rows = np.repeat(np.arange(X.shape[0]), np.diff(X.indptr))
+            dense[rows, X.indices] = X.data
+            return dense
+        return np.asarray(X, dtype=np.float32)[:, self.used_features]
+
+    def apply(self, X) -> np.ndarray:
+        """
+        Return the leaf index reached in every tree, shape (n_rows, n_trees).
+        """
+        Xd = self._dense(X)
+        n_rows, n_cols = Xd.shape
+        n_trees = len(self.roots)
+        flat = Xd.ravel()
+        check_missing = bool(np.isnan(flat).any())
+
+        leaves = np.tile(self.roots, n_rows)
+        # Compacted state of the (row, tree) pairs still inside a tree
+        pair = np.flatnonzero(~self.is_leaf[leaves])
+        node = leaves[pair]
+        offset = (pair // n_trees) * n_cols
+        while pair.size:
+            x = flat[offset + self.feature[node]]
+            go_left = x <= self.threshold[node]
+            if check_missing:
+                missing = np.isnan(x)
+                go_left[missing] = self.missing_left[node[missing]]
+            node = self.children[2 * node + go_left]
+
+            done = self.is_leaf[node]
+            if done.any():
+                leaves[pair[done]] = node[done]
+                keep = ~done
+                pair, node, offset = pair[keep], node[keep], offset[keep]
+        return leaves.reshape(n_rows, n_trees)
+
+    def _predict_block(self, X) -> np.ndarray:
+        leaves = self.apply(X)
+        n_rows, n_trees = leaves.shape
+
+        # np.cumsum adds strictly in tree order, which reproduces the
+        # original implementations' accumulation bit for bit
+        if self.kind == "xgboost":
+            base = np.full((n_rows, 1), self.base_margin, dtype=np.float32)
+            terms = np.concatenate([base, self.value[leaves]], axis=1)
+            margin = np.cumsum(terms, axis=1, dtype=np.float32)[:, -1]
+            # expf() result reproduced by rounding the float64 exp to float32
+            e = np.exp(-margin.astype(np.float64)).astype(np.float32)
+            p = np.float32(1.0) / (np.float32(1.0) + e)
+            return np.column_stack([np.float32(1.0) - p, p])
+
+        proba = np.cumsum(self.value[leaves], axis=1)[:, -1, :]
+        return proba / n_trees
+
+    def predict_proba(self, X) -> np.ndarray:
+        n_rows = X.shape[0]
+        if n_rows <= BLOCK_ROWS:
+            return self._predict_block(X)
+        return np.vstack([
+            self._predict_block(X[start:start + BLOCK_ROWS])
+            for start in range(0, n_rows, BLOCK_ROWS)
+        ])
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
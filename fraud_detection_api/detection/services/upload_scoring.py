@@ -0,0 +1,183 @@
+import pandas as pd
+from django.db import transaction
+from django.utils import timezone
+from detection.models import FraudPrediction, PredictionInputBatch, PredictionSession
+from detection.utils import clean_frame_for_json, reserve_transaction_numbers, iter_csv_chunks, BULK_CREATE_BATCH_SIZE
+from detection import features as fe
+from .fraud_service import FraudService, AVAILABLE_MODELS
+from .rollups import add_to_rollups
+from .dashboard import bump_versions
+from .write_behind import WRITE_BEHIND, get_journal
+
+# Column shown as "text" / stored as captured_text for each fraud type
+CAPTURED_TEXT_COLUMNS = {
+    "fake_review": "text_",
+    "payment": "Product Category",
+    "merchant": "Issuer organization",
+    "chargeback": "Card Number",
+}
+
+
+def score_upload_frame(df: pd.DataFrame, fraud_type: str, merchant_name, first_txn_number: int, session_id=None):
+    """
+    Score an engineered upload frame with every model in one call per model
+    and build the per-record response dicts and unsaved FraudPrediction rows
+    (attached to the given upload session).
+    Returns:
+        tuple -> (records, responses, inputs) with the cleaned input row of each record
+    """
+    scores = FraudService(fraud_type).predict_many(df, models=AVAILABLE_MODELS)
+    columns = {name: scores[name].tolist() for name in scores.columns}
+
+    text_column = CAPTURED_TEXT_COLUMNS.get(fraud_type)
+    if text_column is not None and text_column in df.columns:
+        texts = df[text_column].tolist()
+    else:
+        texts = [None] * len(df)
+    if merchant_name or "merchant_name" not in df.columns:
+        merchants = [merchant_name or None] * len(df)
+    else:
+        merchants = df["merchant_name"].tolist()
+
+    inputs = clean_frame_for_json(df)
+    records, responses = [], []
+    for i in range(len(inputs)):
+        txn_id = f"txn{first_txn_number + i}"
+
+        # One DB row per record (with all models attached)
+        fraud_prediction = FraudPrediction(
+            fraud_type=fraud_type,
+            transaction_id=txn_id,
+            merchant_name=merchants[i],
+            session_id=session_id,
+        )
+
+        response_record = {
+            "transaction_id": txn_id,
+            "merchant_name": fraud_prediction.merchant_name,
+            "fraud_type": fraud_type,
+        }
+        if text_column is not None:
+            response_record["text"] = texts[i]
+            fraud_prediction.captured_text = texts[i]
+
+        for model_name in AVAILABLE_MODELS:
+            pred_value = columns[model_name][i]
+            prob_value = columns[f"{model_name}_probability"][i]
+
+            response_record[model_name] = {
+                "status": pred_value,
+                "probability": prob_value
+            }
+            setattr(fraud_prediction, model_name, pred_value)
+            setattr(fraud_prediction, f"{model_name}_probability", prob_value)
+
+            # RandomForest as base
+            if model_name == "random_forest":
+                fraud_prediction.status = pred_value
+                response_record["flag"] = pred_value
+
+        records.append(fraud_prediction)
+        responses.append(response_record)
+
+    return records, responses, inputs
+
+
+def save_upload_records(records, inputs):
+    """
+    Persist scored rows: written to the database now, or with
+    FRAUD_WRITE_BEHIND journaled locally and written by the background drainer.
+    """
+    if WRITE_BEHIND:
+        journal = get_journal()
+        journal.enqueue(records, inputs)
+        journal.start()
+    else:
+        write_predictions(records, inputs)
+
+
+def write_predictions(records, inputs, journal_key=None):
+    """
+    Bulk save scored rows in batches of BULK_CREATE_BATCH_SIZE, with their
+    raw input rows packed into one PredictionInputBatch, and add them to the
+    daily rollups in the same transaction; the cached dashboard aggregates of
+    the affected merchants are invalidated once it commits.
+    """
+    merchant_names = {record.merchant_name for record in records}
+    with transaction.atomic():
+        input_batch = PredictionInputBatch.pack(inputs)
+        input_batch.journal_key = journal_key
+        input_batch.save()
+        for offset, record in enumerate(records):
+            record.input_batch = input_batch
+            record.input_offset = offset
+        FraudPrediction.objects.bulk_create(records, batch_size=BULK_CREATE_BATCH_SIZE)
+        add_to_rollups(records)
+        transaction.on_commit(lambda: bump_versions(merchant_names))
+
+
+def process_upload(file_obj, fraud_type: str, merchant_name):
+    """
+    Stream an uploaded CSV through feature engineering and scoring.
+    Each chunk is saved (in the current upload session) before its response
+    records are yielded.
+    Yields:
+        list -> response records for one chunk
+    """
+    session_id = PredictionSession.current_id()
+    for chunk in iter_csv_chunks(file_obj):
+        df = fe.engineer(chunk)
+        # One round-trip reserves the ids for the whole chunk
+        first_txn_number = reserve_transaction_numbers(len(df))
+        records, responses, inputs = score_upload_frame(df, fraud_type, merchant_name, first_txn_number, session_id)
+
+        save_upload_records(records, inputs)
+        yield responses
+
+
+def score_batch_frame(df: pd.DataFrame, fraud_type: str):
+    """
+    Score a raw batch frame with every model and build the grouped-per-record
+    results and unsaved FraudPrediction rows for the predict-batch endpoint.
+    Returns:
+        tuple -> (records, results, inputs) with the raw input row of each record
+    """
+    scores = FraudService(fraud_type).predict_many(df, models=AVAILABLE_MODELS)
+    columns = {name: scores[name].tolist() for name in scores.columns}
+    created_at = timezone.now().isoformat()
+
+    inputs = df.to_dict("records")
+    records, results = [], []
+    for i, row in enumerate(inputs):
+        record_dict = {
+            "id": None,
+            "fraud_type": fraud_type,
+            "input_data": row,
+            "created_at": created_at,
+        }
+
+        # One DB row for all models
+        fraud_prediction = FraudPrediction(fraud_type=fraud_type)
+
+        for model_name in AVAILABLE_MODELS:
+            for field in (model_name, f"{model_name}_probability"):
+                record_dict[field] = columns[field][i]
+                setattr(fraud_prediction, field, columns[field][i])
+
+        records.append(fraud_prediction)
+        results.append(record_dict)
+
+    return records, results, inputs
+
+
+def process_batch(file_obj, fraud_type: str):
+    """
+    Stream an uploaded CSV through the predict-batch scoring.
+    Each chunk is saved before its results are yielded.
+    Yields:
+        list -> grouped-per-record results for one chunk
+    """
+    for chunk in iter_csv_chunks(file_obj):
+        records, results, inputs = score_batch_frame(chunk, fraud_type)
+        save_upload_records(records, inputs)
+        yield results
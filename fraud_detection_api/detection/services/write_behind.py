@@ -0,0 +1,289 @@
+import os
+import json
+import time
+import uuid
+import zlib
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from detection.models import FraudPrediction, PredictionInputBatch
+
+# Upload writes go to a local journal and are drained to the database in the
+# background instead of inside the request (off by default)
+WRITE_BEHIND = getattr(settings, "FRAUD_WRITE_BEHIND", False)
+WRITE_BEHIND_PATH = str(getattr(
+    settings, "FRAUD_WRITE_BEHIND_PATH", os.path.join(settings.BASE_DIR, "var", "queue", "predictions.sqlite3")
+))
+# Rows written to the database per drain transaction
+WRITE_BEHIND_BATCH_ROWS = getattr(settings, "FRAUD_WRITE_BEHIND_BATCH_ROWS", 20000)
+# Claimed entries not applied within this time are picked up by another drainer
+WRITE_BEHIND_LEASE_SECONDS = getattr(settings, "FRAUD_WRITE_BEHIND_LEASE_SECONDS", 300)
+# Entries failing this many times are parked (kept in the journal, no longer drained)
+WRITE_BEHIND_MAX_ATTEMPTS = getattr(settings, "FRAUD_WRITE_BEHIND_MAX_ATTEMPTS", 10)
+# Longest pause between retries after a failed drain
+WRITE_BEHIND_MAX_BACKOFF_SECONDS = 60
+
+# FraudPrediction values carried through the journal; the id, created_at and
+# input batch link are assigned when the entry is applied
+RECORD_FIELDS = [
+    field.attname for field in FraudPrediction._meta.concrete_fields
+    if field.attname not in ("id", "created_at", "input_batch_id", "input_offset")
+]
+
+logger = logging.getLogger(__name__)
+
+
+class PredictionJournal:
+    """
+    Durable local queue of scored upload chunks, in a SQLite file.
+
+    enqueue() commits one entry per chunk (compressed JSON of the record
+    fields and raw inputs). Any process can drain the file: entries are
+    claimed under a lease, applied to the database through
+    write_entries(entries) and only then deleted. Every entry carries a key
+    that is saved on its PredictionInputBatch, so an entry applied just
+    before a crash is recognised and skipped instead of written twice.
+    An entry that failed before is retried on its own, so one bad entry
+    cannot hold back the others, and is parked after max_attempts until
+    requeue_parked() is called.
+    """
+
+    def __init__(self, path: str, write_entries, batch_rows: int = WRITE_BEHIND_BATCH_ROWS,
+                 lease: float = WRITE_BEHIND_LEASE_SECONDS, max_attempts: int = WRITE_BEHIND_MAX_ATTEMPTS):
+        self.path = path
+        self.write_entries = write_entries
+        self.batch_rows = batch_rows
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.drained_entries = 0
+        self.drained_rows = 0
+        self.failures = 0
+        self.last_error = None
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._connect() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " key TEXT NOT NULL UNIQUE,"
+                " enqueued_at REAL NOT NULL,"
+                " row_count INTEGER NOT NULL,"
+                " payload BLOB NOT NULL,"
+                " claimed_until REAL NOT NULL DEFAULT 0,"
+                " attempts INTEGER NOT NULL DEFAULT 0)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        # Autocommit connection per operation; each statement is durable on return
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=FULL")
+            yield db
+        finally:
+            db.close()
+
+    def enqueue(self, records, inputs) -> str:
+        """
+        Durably store one chunk of unsaved FraudPrediction rows and their raw
+        inputs, and wake the drainer.
+        Returns:
+            str -> the entry key
+        """
+        key = uuid.uuid4().hex
+        payload = {
+            "records": [{name: getattr(record, name) for name in RECORD_FIELDS} for record in records],
+            "inputs": inputs,
+        }
+        blob = zlib.compress(json.dumps(payload, default=str).encode())
+        with self._connect() as db:
+            db.execute(
+                "INSERT INTO entries (key, enqueued_at, row_count, payload) VALUES (?, ?, ?, ?)",
+                (key, time.time(), len(records), blob),
+            )
+        self._wake.set()
+        return key
+
+    def _claim(self) -> list:
+        """
+        Lease the oldest unclaimed entries, up to batch_rows rows (at least one
+        entry). An entry that already failed is claimed alone.
+        """
+        now = time.time()
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            rows = db.execute(
+                "SELECT id, key, row_count, attempts FROM entries"
+                " WHERE claimed_until < ? AND attempts < ? ORDER BY id",
+                (now, self.max_attempts),
+            )
+            claimed, total = [], 0
+            for entry_id, key, row_count, attempts in rows:
+                if claimed and (attempts or total + row_count > self.batch_rows):
+                    break
+                claimed.append((entry_id, key))
+                total += row_count
+                if attempts:
+                    break
+            if claimed:
+                ids = [entry_id for entry_id, _ in claimed]
+                marks = ",".join("?" * len(ids))
+                db.execute(
+                    f"UPDATE entries SET claimed_until = ?, attempts = attempts + 1 WHERE id IN ({marks})",
+                    [now + self.lease, *ids],
+                )
+                payloads = dict(db.execute(f"SELECT id, payload FROM entries WHERE id IN ({marks})", ids))
+            db.execute("COMMIT")
+        return [(entry_id, key, json.loads(zlib.decompress(payloads[entry_id]))) for entry_id, key in claimed]
+
+    def requeue_parked(self) -> int:
+        """
+        Give parked entries (failed max_attempts times) a fresh set of
+        attempts, e.g. once the cause of their failure is fixed, and wake
+        the drainer.
+        Returns:
+            int -> entries requeued
+        """
+        with self._connect() as db:
+            requeued = db.execute(
+                "UPDATE entries SET attempts = 0, claimed_until = 0 WHERE attempts >= ?", (self.max_attempts,)
+            ).rowcount
+        if requeued:
+            self._wake.set()
+        return requeued
+
+    def _finish(self, entry_ids, applied: bool):
+        marks = ",".join("?" * len(entry_ids))
+        with self._connect() as db:
+            if applied:
+                db.execute(f"DELETE FROM entries WHERE id IN ({marks})", entry_ids)
+            else:
+                # Release the lease so the retry follows the drainer's backoff
+                db.execute(f"UPDATE entries SET claimed_until = 0 WHERE id IN ({marks})", entry_ids)
+
+    def drain_once(self) -> int:
+        """
+        Apply one batch of claimed entries to the database.
+        Returns:
+            int -> rows written (0 when nothing was waiting)
+        """
+        claimed = self._claim()
+        if not claimed:
+            return 0
+        entry_ids = [entry_id for entry_id, _, _ in claimed]
+        try:
+            self.write_entries([(key, entry) for _, key, entry in claimed])
+        except Exception:
+            self._finish(entry_ids, applied=False)
+            raise
+        self._finish(entry_ids, applied=True)
+        rows = sum(len(entry["records"]) for _, _, entry in claimed)
+        with self._lock:
+            self.drained_entries += len(claimed)
+            self.drained_rows += rows
+        return rows
+
+    def drain(self):
+        """
+        Drain until the journal is empty (or only holds entries leased by
+        another drainer).
+        """
+        while self.drain_once():
+            pass
+
+    def _run(self):
+        backoff = 1
+        while True:
+            self._wake.wait(timeout=1.0)
+            self._wake.clear()
+            try:
+                close_old_connections()
+                self.drain()
+                backoff = 1
+            except Exception as exc:
+                with self._lock:
+                    self.failures += 1
+                    self.last_error = f"{type(exc).__name__}: {exc}"
+                logger.exception("Write-behind drain failed; retrying in %ss", backoff)
+                time.sleep(backoff)
+                backoff = min(backoff * 2, WRITE_BEHIND_MAX_BACKOFF_SECONDS)
+
+    def start(self):
+        # Started per process (gunicorn post_fork, or on first enqueue)
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+                self._thread.start()
+
+    def stats(self) -> dict:
+        with self._connect() as db:
+            entries, rows, oldest, parked = db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(row_count), 0),"
+                " MIN(CASE WHEN attempts < ? THEN enqueued_at END),"
+                " COALESCE(SUM(attempts >= ?), 0) FROM entries",
+                (self.max_attempts, self.max_attempts),
+            ).fetchone()
+        with self._lock:
+            return {
+                "pending_entries": entries,
+                "pending_rows": rows,
+                "parked_entries": parked,
+                "lag_seconds": round(time.time() - oldest, 3) if oldest else 0.0,
+                "drained_entries": self.drained_entries,
+                "drained_rows": self.drained_rows,
+                "failures": self.failures,
+                "last_error": self.last_error,
+                "drainer_running": self._thread is not None and self._thread.is_alive(),
+            }
+
+
+def apply_entries(entries):
+    """
+    Write journal entries to the database in one transaction, skipping the
+    ones whose input batch already exists (applied before a crash).
+    """
+    from .upload_scoring import write_predictions
+
+    keys = [key for key, _ in entries]
+    applied = set(PredictionInputBatch.objects.filter(journal_key__in=keys).values_list("journal_key", flat=True))
+    with transaction.atomic():
+        for key, entry in entries:
+            if key in applied:
+                continue
+            records = [FraudPrediction(**values) for values in entry["records"]]
+            write_predictions(records, entry["inputs"], journal_key=key)
+
+
+_journal = None
+_journal_lock = threading.Lock()
+
+
+def get_journal() -> PredictionJournal:
+    global _journal
+    with _journal_lock:
+        if _journal is None:
+            _journal = PredictionJournal(WRITE_BEHIND_PATH, apply_entries)
+        return _journal
+
+
+def start_drainer():
+    """
+    Start this process' drainer thread when write-behind is enabled, so
+    entries left from before a restart are written without waiting for a new upload.
+    """
+    if WRITE_BEHIND:
+        get_journal().start()
+
+
+def write_behind_stats() -> dict:
+    if not WRITE_BEHIND and not os.path.exists(WRITE_BEHIND_PATH):
+        return {"enabled": False}
+    return {"enabled": WRITE_BEHIND, **get_journal().stats()}
@@ -1,3 +1,655 @@
-from django.test import TestCase
+import importlib
+import os
+import re
+import sys
+import tempfile
+import time
+import uuid
+from types import SimpleNamespace
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.impute import SimpleImputer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from xgboost import XGBClassifier
+
+from detection.models import (
+    FraudDailyRollup, FraudPrediction, PredictionInputBatch, PredictionSession, ScoringJob, TransactionCounter,
+)
+from detection.services import coalescer, dashboard
+from detection.services.jobs import check_orphaned, fail_orphaned_jobs, process_owner, read_results
+from detection.services.ensemble import load_compiled, load_ensemble
+from detection.services.fraud_service import FraudService, AVAILABLE_MODELS
+from detection.services.model_loader import registry
+from detection.services.prediction_cache import PredictionCache, prediction_cache, record_row_keys
+from detection.services.report_generator import (
+    QUANTILES, SKETCH_RESOLUTION, ProbabilitySketch, ReportAccumulator, parse_view_types,
+)
+from detection.services.row_vectorizer import RowVectorizer
+from detection.services.tree_engine import TREE_ARRAYS_EXT
+from detection.services.upload_scoring import write_predictions
+from detection.services.write_behind import PredictionJournal, apply_entries
+from detection.utils import (
+    FIRST_TRANSACTION_NUMBER, clean_for_json, clean_frame_for_json, reserve_transaction_numbers,
+)
+
+# The training code (src/) sits next to the Django project
+sys.path.insert(0, str(settings.BASE_DIR.parent))
+from src.preprocess import build_preprocessor  # noqa: E402
+from src.train import build_models, export_tree_arrays, save_fused_ensemble, save_model  # noqa: E402
+
+PREDICTIONS = FraudPrediction._meta.db_table
+ROLLUPS = FraudDailyRollup._meta.db_table
+
+
+def full_scan(plan: str, table: str) -> bool:
+    """
+    True when an EXPLAIN plan reads the whole table instead of an index.
+    """
+    if connection.vendor == "mysql":
+        return re.search(rf'"table_name":\s*"{table}",\s*"access_type":\s*"ALL"', plan) is not None
+    return re.search(rf"\bSCAN {table}$", plan, re.MULTILINE) is not None
+
+
+@skipUnless(connection.vendor in ("sqlite", "mysql"), "query plans are only checked on SQLite and MySQL")
+class DashboardQueryPlanTests(TestCase):
+    """
+    The dashboard aggregates must read the daily rollups, and the per-session
+    category summary only its session's rows, however large
+    fraud_predictions_new grows.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        sessions = [PredictionSession.objects.create() for _ in range(5)]
+        FraudPrediction.objects.bulk_create([
+            FraudPrediction(
+                transaction_id=f"TXN{i:06d}",
+                fraud_type=("chargeback", "merchant")[i % 2],
+                merchant_name=f"merchant-{i % 7}",
+                captured_text=f"category-{i % 3}",
+                status=i % 4 == 0,
+                session=sessions[i % len(sessions)],
+            )
+            for i in range(500)
+        ])
+        FraudDailyRollup.objects.bulk_create([
+            FraudDailyRollup(merchant_name=f"merchant-{m}", fraud_type=fraud_type, day=timezone.localdate(), total=10)
+            for m in range(7) for fraud_type in ("chargeback", "merchant")
+        ])
+        cls.session_id = sessions[-1].id
+
+    def explain(self, queryset) -> str:
+        return queryset.explain(format="json") if connection.vendor == "mysql" else queryset.explain()
+
+    def assertReadsRollupsOnly(self, queryset):
+        plan = self.explain(queryset)
+        self.assertIn(ROLLUPS, plan)
+        self.assertNotIn(PREDICTIONS, plan)
+
+    def test_fraud_summary_reads_rollups(self):
+        self.assertReadsRollupsOnly(dashboard.fraud_type_summary())
+
+    def test_merchant_fraud_reads_rollups(self):
+        self.assertReadsRollupsOnly(dashboard.merchant_fraud())
+
+    def test_merchant_fraud_summary_searches_rollup_key(self):
+        queryset = dashboard.merchant_fraud_summary("merchant-3")
+        self.assertReadsRollupsOnly(queryset)
+        self.assertFalse(full_scan(self.explain(queryset), ROLLUPS))
+
+    def test_captured_text_summary_uses_session_index(self):
+        plan = self.explain(dashboard.captured_text_summary(self.session_id))
+        self.assertIn("fraud_pred_session_id_idx", plan)
+        self.assertFalse(full_scan(plan, PREDICTIONS))
+
+
+class CompiledTreesParityTests(SimpleTestCase):
+    """
+    The exported tree arrays, loaded through load_compiled, must score like
+    the estimator they were exported from, for batches and single rows.
+    """
+    fraud_type = "tree_parity_test"
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        rng = np.random.default_rng(0)
+        X = rng.normal(size=(400, 8))
+        y = (X[:, 0] + X[:, 1] * X[:, 2] + rng.normal(scale=0.5, size=400) > 0).astype(int)
+        # Mostly-zero columns, like one-hot and TF-IDF output
+        X[:, 5:] = np.where(rng.random((400, 3)) < 0.7, 0.0, X[:, 5:])
+        cls.X = X
+        cls.X_sparse = sparse.csr_matrix(X)
+        cls.models = {
+            "random_forest": RandomForestClassifier(n_estimators=15, max_depth=6, random_state=0).fit(X, y),
+            "xgboost": XGBClassifier(n_estimators=15, max_depth=4, eval_metric="logloss", random_state=0)
+            .fit(cls.X_sparse, y),
+        }
+        cls.tmp = tempfile.TemporaryDirectory()
+        models_dir = os.path.join(cls.tmp.name, cls.fraud_type, "models")
+        os.makedirs(models_dir)
+        for name, model in cls.models.items():
+            np.savez(os.path.join(models_dir, f"{name}{TREE_ARRAYS_EXT}"), **export_tree_arrays(model))
+
+    @classmethod
+    def tearDownClass(cls):
+        registry.clear()
+        cls.tmp.cleanup()
+        super().tearDownClass()
+
+    def load(self, name):
+        with mock.patch.object(registry, "base_dir", self.tmp.name), \
+                mock.patch("detection.services.ensemble.COMPILED_TREES_MAX_ROWS", 64):
+            compiled = load_compiled(self.fraud_type, name)
+        self.assertIsNotNone(compiled)
+        return compiled
+
+    def assertParity(self, name, X, tolerance):
+        model, compiled = self.models[name], self.load(name)
+        expected = model.predict_proba(X)
+        np.testing.assert_allclose(compiled.predict_proba(X), expected, rtol=0, atol=tolerance)
+        single = np.vstack([compiled.predict_proba(X[i:i + 1]) for i in range(20)])
+        np.testing.assert_allclose(single, expected[:20], rtol=0, atol=tolerance)
+        np.testing.assert_array_equal(compiled.predict(X), model.predict(X))
+
+    def test_random_forest_dense(self):
+        self.assertParity("random_forest", self.X, 1e-12)
+
+    def test_random_forest_sparse(self):
+        self.assertParity("random_forest", self.X_sparse, 1e-12)
+
+    def test_xgboost_sparse_missing(self):
+        # Entries not stored in the CSR matrix are missing values for XGBoost
+        self.assertParity("xgboost", self.X_sparse, 1e-6)
+
+
+class RowVectorizerParityTests(SimpleTestCase):
+    """
+    JSON records scored through the compiled feature-vector builder must get
+    the same feature matrix and scores as the DataFrame path, for pipelines
+    trained and saved the way src.train does it.
+    """
+    fraud_type = "row_vectorizer_parity_test"
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        rng = np.random.default_rng(0)
+        n = 300
+        words = np.array(["refund", "late", "great", "item", "never", "arrived", "fast", "broken"])
+        df = pd.DataFrame({
+            "amount": rng.gamma(2.0, 50.0, n),
+            "account_age": rng.integers(0, 3000, n).astype(float),
+            "country": rng.choice(["US", "IN", "DE", "BR"], n),
+            "channel": rng.choice(["web", "app", "pos"], n).astype(object),
+            "review": [" ".join(rng.choice(words, 4)) for _ in range(n)],
+        })
+        df.loc[rng.random(n) < 0.1, "account_age"] = np.nan
+        df.loc[rng.random(n) < 0.1, "channel"] = np.nan
+        y = ((df["amount"] > 100) ^ (df["country"] == "BR")).astype(int)
+
+        cls.tmp = tempfile.TemporaryDirectory()
+        models_dir = os.path.join(cls.tmp.name, cls.fraud_type, "models")
+        pipelines = build_models(build_preprocessor(["amount", "account_age"], ["country", "channel"], ["review"]))
+        for name, pipe in pipelines.items():
+            pipe.fit(df, y)
+            save_model(pipe, models_dir, name)
+        save_fused_ensemble(pipelines, models_dir)
+
+        cls.df = df
+        # As the JSON endpoint receives them: missing values are null
+        cls.records = [
+            {key: None if isinstance(value, float) and np.isnan(value) else value for key, value in row.items()}
+            for row in df.to_dict("records")
+        ]
+
+    @classmethod
+    def tearDownClass(cls):
+        registry.clear()
+        cls.tmp.cleanup()
+        super().tearDownClass()
+
+    def setUp(self):
+        # Score every row fresh on both paths
+        for patcher in (
+            mock.patch.object(registry, "base_dir", self.tmp.name),
+            mock.patch.object(prediction_cache, "max_entries", 0),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_feature_matrix_matches_column_transformer(self):
+        fused = load_ensemble(self.fraud_type, AVAILABLE_MODELS)
+        self.assertIsNotNone(fused.row_vectorizer)
+        expected = fused.transform(self.df)
+        actual = fused.row_vectorizer.transform(self.records)
+        self.assertEqual(sparse.issparse(actual), sparse.issparse(expected))
+        if sparse.issparse(expected):
+            # XGBoost reads absent sparse entries as missing, so the pattern must match too
+            self.assertEqual(((expected != 0) != (actual != 0)).nnz, 0)
+            expected, actual = expected.toarray(), actual.toarray()
+        np.testing.assert_array_equal(actual, expected)
+
+    def test_fusing_leaves_cached_pipelines_untouched(self):
+        preprocessors = {
+            name: registry.get(self.fraud_type, name).named_steps["preprocessor"] for name in AVAILABLE_MODELS
+        }
+        fused = load_ensemble(self.fraud_type, AVAILABLE_MODELS)
+        for name in AVAILABLE_MODELS:
+            self.assertIs(registry.get(self.fraud_type, name).named_steps["preprocessor"], preprocessors[name])
+        self.assertEqual(len({id(p) for p in preprocessors.values()}), len(AVAILABLE_MODELS))
+        self.assertIs(fused.preprocessor, preprocessors[AVAILABLE_MODELS[0]])
+
+    def test_scaler_options_match_column_transformer(self):
+        for with_mean, with_std in ((False, True), (True, False), (False, False)):
+            preprocessor = ColumnTransformer([
+                ("num", Pipeline([
+                    ("imputer", SimpleImputer(strategy="median")),
+                    ("scaler", StandardScaler(with_mean=with_mean, with_std=with_std)),
+                ]), ["amount", "account_age"]),
+                ("text", TfidfVectorizer(), "review"),
+            ]).fit(self.df)
+            vectorizer = RowVectorizer.from_preprocessor(preprocessor)
+            expected, actual = preprocessor.transform(self.df), vectorizer.transform(self.records)
+            if sparse.issparse(expected):
+                expected, actual = expected.toarray(), actual.toarray()
+            np.testing.assert_allclose(actual, expected, rtol=1e-12, atol=0)
+
+    def test_record_scores_match_dataframe_scores(self):
+        service = FraudService(self.fraud_type)
+        # Small batches take the exported tree arrays, large ones the native estimators
+        for size in (1, 32, len(self.records)):
+            for start in range(0, min(len(self.records), 3 * size), size):
+                got = service.predict_records(self.records[start:start + size], models=AVAILABLE_MODELS)
+                want = service.predict_many(self.df.iloc[start:start + size], models=AVAILABLE_MODELS)
+                for name in AVAILABLE_MODELS:
+                    self.assertEqual(got[name], want[name].tolist())
+                    self.assertEqual(got[f"{name}_probability"], want[f"{name}_probability"].tolist())
+
+    def test_coalesced_scores_match_direct_scores(self):
+        self.addCleanup(coalescer._coalescers.pop, self.fraud_type, None)
+        got = coalescer.get_coalescer(self.fraud_type).submit(self.records[:5])
+        want = FraudService(self.fraud_type).predict_records(self.records[:5], models=AVAILABLE_MODELS)
+        self.assertEqual(got, want)
+
+
+class CoalescerRegistrationTests(SimpleTestCase):
+    """
+    Scoring an unknown fraud type must not leave a coalescer thread behind.
+    """
+
+    @mock.patch("detection.services.realtime.COALESCE_WINDOW_MS", 2)
+    def test_unknown_fraud_type_registers_nothing(self):
+        response = self.client.post("/api/score/no_such_fraud/", {"amount": 1}, content_type="application/json")
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIn("no_such_fraud", coalescer._coalescers)
+        self.assertNotIn("no_such_fraud", coalescer.coalescer_stats())
+
+
+class ScoringJobTests(TestCase):
+    """
+    Result pages seek to a byte cursor, and jobs of a process that is gone
+    are failed instead of staying RUNNING forever.
+    """
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.job = ScoringJob.objects.create(
+            fraud_type="payment", input_path="", result_path=os.path.join(tmp.name, "results.ndjson"),
+        )
+        with open(self.job.result_path, "w") as fh:
+            fh.writelines(f'{{"row": {i}}}\n' for i in range(10))
+            fh.write('{"row": 1')  # still being written
+
+    def test_results_follow_cursor(self):
+        rows, cursor, more = [], 0, True
+        while more:
+            page, cursor, more = read_results(self.job, cursor, 3)
+            rows += [record["row"] for record in page]
+        self.assertEqual(rows, list(range(10)))
+        self.assertEqual(read_results(self.job, cursor, 3), ([], cursor, False))
+
+    def test_cursor_must_start_a_record(self):
+        with self.assertRaises(ValueError):
+            read_results(self.job, 3, 3)
+
+    def test_fail_orphaned_jobs(self):
+        host = process_owner().rpartition(":")[0]
+        live = ScoringJob.objects.create(fraud_type="payment", status="RUNNING", owner=process_owner())
+        other_host = ScoringJob.objects.create(fraud_type="payment", status="RUNNING", owner="elsewhere:1")
+        dead = ScoringJob.objects.create(fraud_type="payment", status="QUEUED", owner=f"{host}:1")
+        with mock.patch("detection.services.jobs._process_alive", side_effect=lambda pid: pid == os.getpid()):
+            self.assertEqual(fail_orphaned_jobs(), 2)  # dead, and self.job without an owner
+        statuses = dict(ScoringJob.objects.values_list("id", "status"))
+        self.assertEqual(statuses[dead.id], "FAILED")
+        self.assertEqual(statuses[self.job.id], "FAILED")
+        self.assertEqual(statuses[live.id], "RUNNING")
+        self.assertEqual(statuses[other_host.id], "RUNNING")
+
+    def test_status_read_fails_orphaned_job(self):
+        host = process_owner().rpartition(":")[0]
+        job = ScoringJob.objects.create(fraud_type="payment", status="RUNNING", owner=f"{host}:1")
+        with mock.patch("detection.services.jobs._process_alive", return_value=True):
+            self.assertEqual(self.client.get(f"/api/jobs/{job.id}/").json()["status"], "RUNNING")
+        with mock.patch("detection.services.jobs._process_alive", return_value=False):
+            self.assertEqual(self.client.get(f"/api/jobs/{job.id}/").json()["status"], "FAILED")
+        self.assertEqual(check_orphaned(ScoringJob.objects.get(pk=job.id)).status, "FAILED")
+
+
+class CleanFrameForJsonTests(SimpleTestCase):
+    """
+    The column-wise cleaner must give exactly what the per-row clean_for_json
+    gives, values and types alike.
+    """
+
+    def assertSameAsPerRow(self, df):
+        expected = [clean_for_json(row) for row in df.to_dict("records")]
+        actual = clean_frame_for_json(df)
+        self.assertEqual(actual, expected)
+        for got, want in zip(actual, expected):
+            self.assertEqual({k: type(v) for k, v in got.items()}, {k: type(v) for k, v in want.items()})
+
+    def test_matches_clean_for_json(self):
+        self.assertSameAsPerRow(pd.DataFrame({
+            "amount": [1.5, np.nan, np.inf, -np.inf, 0.0],
+            "count": np.array([1, 2, 3, 4, 5], dtype=np.int64),
+            "small": np.array([1, 2, 3, 4, 5], dtype=np.int32),
+            "flag": [True, False, True, False, True],
+            "seen_at": pd.to_datetime(["2024-01-01", None, "2024-03-01", "2024-04-01", None]),
+            "merchant": ["  shop ", "shop", "", " ", "a b "],
+            "text": [" late ", None, np.nan, "ok", "  "],
+            "mixed": [" x ", 3, None, np.float64(2.5), np.int64(7)],
+            "objects": pd.Series([pd.Timestamp("2024-01-01"), "  y", np.nan, True, 1.0], dtype=object),
+        }))
+
+    def test_empty_and_all_missing_columns(self):
+        self.assertSameAsPerRow(pd.DataFrame({"a": [np.nan, np.nan], "b": [None, None]}))
+        self.assertEqual(clean_frame_for_json(pd.DataFrame({"a": []})), [])
+
+
+class PredictionJournalTests(TestCase):
+    """
+    Write-behind journal: batched claims, lease expiry, retry-alone and
+    parking of failing entries, and idempotent re-apply by journal_key.
+    """
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "journal.sqlite3")
+        self.applied = []
+        self.failing = set()
+
+    def write_entries(self, entries):
+        if self.failing & {key for key, _ in entries}:
+            raise RuntimeError("cannot apply entry")
+        self.applied.append([key for key, _ in entries])
+
+    def journal(self, **kwargs):
+        return PredictionJournal(self.path, kwargs.pop("write_entries", self.write_entries), **kwargs)
+
+    def enqueue(self, journal, rows):
+        records = [
+            FraudPrediction(fraud_type="payment", transaction_id=f"txn{uuid.uuid4().hex[:12]}", status=i % 2 == 0)
+            for i in range(rows)
+        ]
+        return journal.enqueue(records, [{"amount": i} for i in range(rows)])
+
+    def test_claims_whole_entries_up_to_batch_rows(self):
+        journal = self.journal(batch_rows=5)
+        keys = [self.enqueue(journal, rows) for rows in (3, 3, 1, 6)]
+        journal.drain()
+        self.assertEqual(self.applied, [keys[:1], keys[1:3], keys[3:]])
+        self.assertEqual(journal.stats()["pending_entries"], 0)
+
+    def test_expired_lease_is_claimed_again(self):
+        key = self.enqueue(self.journal(), 2)
+        crashed = self.journal(lease=60)
+        self.assertEqual([k for _, k, _ in crashed._claim()], [key])
+
+        other = self.journal(lease=60)
+        self.assertEqual(other._claim(), [])
+        later = time.time() + 61
+        with mock.patch("detection.services.write_behind.time.time", return_value=later):
+            self.assertEqual([k for _, k, _ in other._claim()], [key])
+
+    def test_failing_entry_is_retried_alone_then_parked(self):
+        journal = self.journal(max_attempts=2)
+        good, bad, after = (self.enqueue(journal, 1) for _ in range(3))
+        self.failing.add(bad)
+        with self.assertRaises(RuntimeError):
+            journal.drain()  # good and bad fail together
+        with self.assertRaises(RuntimeError):
+            journal.drain()  # good goes alone and is applied, then bad fails alone
+        journal.drain()  # bad is parked; after is applied
+        self.assertEqual(self.applied, [[good], [after]])
+        stats = journal.stats()
+        self.assertEqual((stats["pending_entries"], stats["parked_entries"], stats["lag_seconds"]), (1, 1, 0.0))
+
+        self.failing.clear()
+        self.assertEqual(journal.requeue_parked(), 1)
+        self.assertEqual(journal.requeue_parked(), 0)
+        journal.drain()
+        self.assertEqual(self.applied[-1], [bad])
+        self.assertEqual(journal.stats()["pending_entries"], 0)
+
+    def test_reapplied_entry_is_skipped_by_journal_key(self):
+        journal = self.journal()
+        self.enqueue(journal, 3)
+        entries = [(key, entry) for _, key, entry in journal._claim()]
+        apply_entries(entries)
+        # The drainer died before deleting the entry; the next one applies it again
+        apply_entries(entries)
+        self.assertEqual(FraudPrediction.objects.count(), 3)
+        self.assertEqual(PredictionInputBatch.objects.get().journal_key, entries[0][0])
+
+
+class ReportAccumulatorTests(SimpleTestCase):
+    """
+    Streaming report statistics: sketch quantiles within half a cell of
+    exact, and per-chunk accumulators merging into the single-pass result.
+    """
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.probabilities = np.concatenate([rng.beta(0.5, 3.0, 20000), rng.random(500), [0.0, 1.0]])
+        self.predictions = self.probabilities >= 0.5
+
+    def test_quantiles_within_half_a_cell(self):
+        sketch = ProbabilitySketch()
+        sketch.add(self.probabilities)
+        exact = np.quantile(self.probabilities, QUANTILES, method="inverted_cdf")
+        np.testing.assert_allclose(sketch.quantiles(QUANTILES), exact, rtol=0, atol=1 / (2 * SKETCH_RESOLUTION))
+
+    def test_merged_chunks_match_single_pass(self):
+        single = ReportAccumulator()
+        single.add(self.predictions, self.probabilities)
+        merged = ReportAccumulator()
+        for start in range(0, len(self.probabilities), 3000):
+            chunk = ReportAccumulator()
+            chunk.add(self.predictions[start:start + 3000], self.probabilities[start:start + 3000])
+            merged.merge(chunk)
+
+        for view_type in ("summary", "breakdown"):
+            self.assertEqual(
+                merged.report(view_type, "payment", "xgboost"), single.report(view_type, "payment", "xgboost")
+            )
+        want = single.probabilities()["probability_distribution"]
+        got = merged.probabilities()["probability_distribution"]
+        self.assertAlmostEqual(got.pop("average_probability"), want.pop("average_probability"), places=9)
+        self.assertEqual(got, want)
+        np.testing.assert_array_equal(
+            single.histogram, np.histogram(self.probabilities, bins=len(single.histogram), range=(0.0, 1.0))[0]
+        )
+
+    def test_empty_input(self):
+        report = ReportAccumulator()
+        report.add(np.array([], dtype=bool), np.array([]))
+        self.assertEqual(report.summary("payment", "xgboost")["fraud_rate"], None)
+        distribution = report.probabilities()["probability_distribution"]
+        self.assertIsNone(distribution["average_probability"])
+        self.assertEqual(set(distribution["quantiles"].values()), {None})
+        self.assertEqual(sum(distribution["histogram"]["counts"]), 0)
+        self.assertEqual(report.breakdown("payment")["breakdown"], {"non_fraud": 0, "fraud": 0})
+
+    def test_parse_view_types(self):
+        self.assertEqual(parse_view_types("all"), ["summary", "breakdown", "probabilities"])
+        self.assertEqual(parse_view_types(" probabilities, summary,summary "), ["probabilities", "summary"])
+        for bad in ("", " , ", "summary,totals", "ALL"):
+            with self.assertRaises(ValueError):
+                parse_view_types(bad)
+        with self.assertRaises(ValueError):
+            ReportAccumulator().report("totals", "payment", "xgboost")
+
+
+class PredictionCacheTests(SimpleTestCase):
+    """
+    Per-row prediction cache: TTL expiry, LRU eviction, and a new model
+    digest missing the entries cached for the old artifact.
+    """
+
+    def test_entries_expire_after_ttl(self):
+        cache = PredictionCache(max_entries=10, ttl=5)
+        with mock.patch("detection.services.prediction_cache.time.monotonic", return_value=100.0):
+            cache.put_many([("a", (True, 0.9))])
+        with mock.patch("detection.services.prediction_cache.time.monotonic", return_value=104.0):
+            self.assertEqual(cache.get_many(["a"]), [(True, 0.9)])
+        with mock.patch("detection.services.prediction_cache.time.monotonic", return_value=106.0):
+            self.assertEqual(cache.get_many(["a"]), [None])
+        self.assertEqual((cache.stats()["expirations"], cache.stats()["entries"]), (1, 0))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = PredictionCache(max_entries=2, ttl=60)
+        cache.put_many([("a", 1), ("b", 2)])
+        cache.get_many(["a"])
+        cache.put_many([("c", 3)])
+        self.assertEqual(cache.get_many(["a", "b", "c"]), [1, None, 3])
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_new_model_digest_misses_old_entries(self):
+        records = [
+            {"amount": 10.0, "country": "US"}, {"amount": 20.0, "country": "IN"}, {"amount": 10, "country": "US"},
+        ]
+        keys = record_row_keys(records, ["amount", "country"])
+        self.assertEqual(keys[0], keys[2])
+        scored = []
+
+        def score_rows(idx):
+            scored.append(idx.tolist())
+            return {"xgboost": (np.ones(len(idx), dtype=bool), np.full(len(idx), 0.75))}
+
+        service = FraudService("payment", "xgboost")
+        with mock.patch("detection.services.fraud_service.prediction_cache", PredictionCache(100, 60)):
+            for digest in ("a" * 64, "a" * 64, "b" * 64):
+                fused = SimpleNamespace(versions={"xgboost": digest})
+                scores = service._cached_scores(fused, keys, ["xgboost"], score_rows)
+                self.assertEqual(scores["xgboost"][1].tolist(), [0.75] * 3)
+        # Each distinct row once per digest; the repeated digest is served from the cache
+        self.assertEqual(scored, [[0, 1], [0, 1]])
+
+
+class TransactionNumberTests(TestCase):
+    """
+    Reserved transaction-number blocks are contiguous and never overlap, and
+    the 0004 seed continues after the highest txn<N> already stored.
+    """
+
+    def reserve_blocks(self, sizes):
+        blocks = [range(first, first + size) for first, size in
+                  ((reserve_transaction_numbers(size), size) for size in sizes)]
+        for previous, block in zip(blocks, blocks[1:]):
+            self.assertEqual(block.start, previous.stop)
+        return blocks
+
+    def test_blocks_on_fresh_table(self):
+        TransactionCounter.objects.all().delete()
+        blocks = self.reserve_blocks([5, 1, 3, 1000])
+        self.assertEqual(blocks[0].start, FIRST_TRANSACTION_NUMBER)
+        self.assertEqual(TransactionCounter.objects.get().next_value, blocks[-1].stop)
+
+    def test_blocks_after_existing_counter(self):
+        TransactionCounter.objects.update_or_create(pk="transaction_id", defaults={"next_value": 5000})
+        self.assertEqual(self.reserve_blocks([2, 2, 7])[0].start, 5000)
+
+    def test_seed_follows_highest_existing_transaction_id(self):
+        FraudPrediction.objects.bulk_create([
+            FraudPrediction(fraud_type="payment", transaction_id=transaction_id)
+            for transaction_id in ("txn9", "txn1500", "txn250", "txnabc", "order-77777", None)
+        ])
+        TransactionCounter.objects.all().delete()
+        migration = importlib.import_module("detection.migrations.0004_transactioncounter")
+        migration.seed_counter(apps, None)
+        self.assertEqual(self.reserve_blocks([10, 1])[0].start, 1501)
+
+
+class DashboardCacheInvalidationTests(TestCase):
+    """
+    A committed write_predictions bumps the merchant's version (on commit), so
+    the cached merchant summary is recomputed; a rolled-back write does not.
+    """
+
+    def setUp(self):
+        patcher = mock.patch.object(dashboard, "DASHBOARD_CACHE", "default")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        caches["default"].clear()
+        self.addCleanup(caches["default"].clear)
+
+    def write(self, rows, merchant="acme"):
+        records = [
+            FraudPrediction(
+                fraud_type="payment", merchant_name=merchant, status=True,
+                transaction_id=f"txn{uuid.uuid4().hex[:12]}",
+            )
+            for _ in range(rows)
+        ]
+        write_predictions(records, [{} for _ in range(rows)])
+
+    def total(self, merchant="acme"):
+        return self.client.get("/api/merchant-fraud-summary/", {"merchant": merchant}).json()["totalTransactions"]
+
+    def version(self, merchant="acme"):
+        return dashboard._versions(caches["default"], [dashboard.merchant_scope(merchant)])
+
+    def test_committed_write_invalidates_merchant_summary(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.write(2)
+        self.assertEqual(self.total(), 2)
+        self.assertEqual(self.total("other"), 0)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.write(3)
+        # Until the write commits, readers keep getting the cached counts
+        self.assertEqual(self.total(), 2)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.total(), 5)
+        self.assertEqual(self.total("other"), 0)
+
+    def test_rolled_back_write_keeps_cached_summary(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.write(2)
+        self.assertEqual(self.total(), 2)
+        version = self.version()
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                self.write(3)
+                raise RuntimeError("upload failed")
+        self.assertEqual(callbacks, [])
+        self.assertEqual(self.version(), version)
+        self.assertEqual(self.total(), 2)
@@ -1,12 +1,19 @@
 from django.urls import path
-from .views import FraudAnalysisView, MerchantFraudSummaryView, FraudPredictionTempSummaryView, FraudByCapturedTextView, FraudDetectionUploadView, FraudPredictionTempClearView, FraudDetectionBatchView
+from .views import FraudAnalysisView, MerchantFraudSummaryView, FraudPredictionTempSummaryView, FraudByCapturedTextView, FraudDetectionUploadView, FraudPredictionTempClearView, FraudDetectionBatchView, FraudScoreView, ServiceMetricsView, ScoringJobCreateView, ScoringJobDetailView, ScoringJobResultsView, ArchivedPredictionsView, FraudPredictionDetailView
 
 urlpatterns = [
     path("predict/<str:fraud_type>/<str:view_type>/", FraudAnalysisView.as_view(), name="fraud-analysis"),
     path("predict-upload/", FraudDetectionUploadView.as_view(), name="fraud-upload"),
     path("predict-batch/<str:fraud_type>/", FraudDetectionBatchView.as_view(), name="predict-batch"),
+    path("score/<str:fraud_type>/", FraudScoreView.as_view(), name="fraud-score"),
+    path("jobs/", ScoringJobCreateView.as_view(), name="scoring-job-create"),
+    path("jobs/<uuid:job_id>/", ScoringJobDetailView.as_view(), name="scoring-job-detail"),
+    path("jobs/<uuid:job_id>/results/", ScoringJobResultsView.as_view(), name="scoring-job-results"),
+    path("predictions/<int:pk>/", FraudPredictionDetailView.as_view(), name="fraud-prediction-detail"),
+    path("archive/<str:fraud_type>/", ArchivedPredictionsView.as_view(), name="archived-predictions"),
     path("clear-temp/", FraudPredictionTempClearView.as_view(), name="clear-temp"),
     path("temp-summary/", FraudPredictionTempSummaryView.as_view(), name="temp-summary"),
     path("temp-category/", FraudByCapturedTextView.as_view(), name="temp-summary"),
     path("merchant-fraud-summary/", MerchantFraudSummaryView.as_view(), name="merchant-fraud-summary"),
+    path("metrics/", ServiceMetricsView.as_view(), name="service-metrics"),
 ]
\ No newline at end of file
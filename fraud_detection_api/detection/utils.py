@@ -1,27 +1,92 @@
-from .models import FraudPrediction
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from .models import TransactionCounter
 import pandas as pd
 import numpy as np
 
-def get_next_transaction_number():
-    last = FraudPrediction.objects.order_by("id").last()
-    if not last or not last.transaction_id:
-        return 101
-    try:
-        return int(last.transaction_id.replace("txn", "")) + 1
-    except ValueError:
-        return 101
-    
+# Rows read from an uploaded CSV per chunk, and rows per INSERT in bulk_create
+UPLOAD_CHUNK_ROWS = getattr(settings, "FRAUD_UPLOAD_CHUNK_ROWS", 5000)
+BULK_CREATE_BATCH_SIZE = getattr(settings, "FRAUD_BULK_CREATE_BATCH_SIZE", 1000)
+
+# First transaction number handed out on an empty database
+FIRST_TRANSACTION_NUMBER = 101
+TRANSACTION_COUNTER = "transaction_id"
+
+
+def reserve_transaction_numbers(count: int) -> int:
+    """
+    Atomically reserve `count` consecutive transaction numbers and return the
+    first one. The counter row stays locked by the UPDATE until the
+    transaction commits, so concurrent uploads always get disjoint blocks.
+    """
+    with transaction.atomic():
+        updated = TransactionCounter.objects.filter(pk=TRANSACTION_COUNTER).update(
+            next_value=F("next_value") + count
+        )
+        if not updated:
+            TransactionCounter.objects.get_or_create(
+                pk=TRANSACTION_COUNTER, defaults={"next_value": FIRST_TRANSACTION_NUMBER}
+            )
+            TransactionCounter.objects.filter(pk=TRANSACTION_COUNTER).update(
+                next_value=F("next_value") + count
+            )
+        next_value = TransactionCounter.objects.values_list("next_value", flat=True).get(pk=TRANSACTION_COUNTER)
+    return next_value - count
+
+
 def clean_for_json(data: dict) -> dict:
     clean = {}
     for k, v in data.items():
-        if isinstance(v, (np.generic,)):
-            v = v.item()
+        clean[k] = _clean_value(v)
+    return clean
+
+
+def _clean_value(v):
+    if isinstance(v, (np.generic,)):
+        v = v.item()
+
+    if pd.isna(v):
+        v = None
+
+    if isinstance(v, str):
+        v = v.strip()
+
+    return v
+
+
+def clean_frame_for_json(df: pd.DataFrame) -> list:
+    """
+    Column-wise clean_for_json for a whole frame: strips strings, turns
+    NaN/None into None and numpy scalars into Python natives.
+    Returns:
+        list -> one JSON-ready dict per row, in frame order
+    """
+    columns = []
+    for name in df.columns:
+        series = df[name]
+        if series.dtype == object:
+            if pd.api.types.infer_dtype(series, skipna=True) == "string":
+                series = series.str.strip()
+            else:
+                # Mixed column: fall back to the per-value rules
+                columns.append([_clean_value(v) for v in series.tolist()])
+                continue
+        # tolist() already yields Python ints/floats/bools
+        values = series.tolist()
+        if series.hasnans:
+            values = [None if missing else v for v, missing in zip(values, series.isna().tolist())]
+        columns.append(values)
 
-        if pd.isna(v):
-            v = None
+    keys = list(df.columns)
+    return [dict(zip(keys, row)) for row in zip(*columns)]
 
-        if isinstance(v, str):
-            v = v.strip()
 
-        clean[k] = v
-    return clean
\ No newline at end of file
+def iter_csv_chunks(file_obj, chunksize: int = UPLOAD_CHUNK_ROWS):
+    """
+    Yield an uploaded CSV as DataFrames of at most `chunksize` rows,
+    so large files are never fully loaded in memory.
+    """
+    for chunk in pd.read_csv(file_obj, chunksize=chunksize):
+        if not chunk.empty:
+            yield chunk
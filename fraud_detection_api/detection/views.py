@@ -1,17 +1,47 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.parsers import MultiPartParser, FormParser
-import pandas as pd
+from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from detection.services.fraud_service import FraudService
-from .models import FraudPrediction, FraudPredictionTemp
-from .serializers import FraudPredictionSerializer
-from django.utils import timezone
-from .utils import get_next_transaction_number, clean_for_json
+from detection.services.report_generator import parse_view_types
+from detection.services.model_loader import cache_stats
+from detection.services.upload_scoring import process_upload, process_batch
+from detection.services.jobs import check_orphaned, submit_job, read_results
+from detection.services.realtime import score_records, SCORE_MAX_ROWS
+from detection.services.coalescer import coalescer_stats
+from detection.services.prediction_cache import prediction_cache_stats
+from detection.services.write_behind import write_behind_stats
+from detection.services.archive import read_archived, ArchiveUnavailable
+from detection.services.dashboard import captured_text_summary, merchant_fraud_summary, cached_aggregate, merchant_scope
+from .models import FraudPrediction, PredictionSession, ScoringJob
+from .serializers import FraudPredictionSerializer, ScoringJobSerializer
+from .renderers import RESULT_RENDERER_CLASSES
+from .utils import iter_csv_chunks
 import json
-import numpy as np
-from . import features as fe
 from rest_framework import status
 from django.db.models import Count, Q
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.dateparse import parse_date
+
+
+def wants_stream(request) -> bool:
+    return request.query_params.get("stream", "").lower() in ("1", "true", "yes")
+
+
+def ndjson_response(chunks) -> StreamingHttpResponse:
+    """
+    Stream an iterable of record lists as newline-delimited JSON, one line
+    per record, writing each list as soon as it is produced.
+    """
+    def lines():
+        for records in chunks:
+            if records:
+                yield "".join(json.dumps(record, default=str) + "\n" for record in records)
+
+    response = StreamingHttpResponse(lines(), content_type="application/x-ndjson")
+    # Keep reverse proxies from buffering the whole body
+    response["X-Accel-Buffering"] = "no"
+    return response
 
 
 class FraudAnalysisView(APIView):
@@ -22,22 +52,26 @@ class FraudAnalysisView(APIView):
         POST API:
         - Upload CSV file
         - fraud_type: fake_review, payment, chargeback, merchant
-        - view_type: summary, breakdown, probabilities
+        - view_type: summary, breakdown, probabilities; several comma-separated
+          (summary,probabilities) or all, computed from one scoring pass
+        - A single view_type returns that report; several return
+          {view_type: report}
         """
-        df = pd.read_csv(request.FILES['file'])
-
-        service = FraudService(fraud_type, model_name="random_forest")  
-        df_pred = service.predict(df)
-
-        # Handle tuple returns (model, df)
-        if isinstance(df_pred, tuple):
-            df_pred = df_pred[1]
-
-        result = service.generate_report(df_pred, view_type)
-        return Response(result)
+        try:
+            view_types = parse_view_types(view_type)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=400)
+        service = FraudService(fraud_type, model_name="random_forest")
+
+        # Score chunk by chunk into running totals; nothing is kept per row
+        reports = service.analyze(iter_csv_chunks(request.FILES['file']), view_types)
+        if len(view_types) == 1:
+            return Response(reports[view_types[0]])
+        return Response(reports)
 
 class FraudDetectionBatchView(APIView):
     parser_classes = [MultiPartParser, FormParser]
+    renderer_classes = RESULT_RENDERER_CLASSES
 
     def post(self, request, fraud_type):
         """
@@ -46,53 +80,15 @@ class FraudDetectionBatchView(APIView):
         - Runs predictions using RandomForest, Logistic Regression, XGBoost
         - Saves all predictions in DB
         - Returns results grouped per record
+        - ?stream=1: NDJSON, one result per line, written as each chunk is saved
         """
-        file_obj = request.FILES['file']
-        df = pd.read_csv(file_obj)
+        chunks = process_batch(request.FILES['file'], fraud_type)
+        if wants_stream(request):
+            return ndjson_response(chunks)
 
-        available_models = ["random_forest", "log_reg", "xgboost"]
         results = []
-        records = []
-
-        for _, row in df.iterrows():
-            record_dict = {
-                "id": None,
-                "fraud_type": fraud_type,
-                "input_data": row.to_dict(),
-                "created_at": timezone.now().isoformat()
-            }
-
-            # One DB row for all models
-            fraud_prediction = FraudPrediction(
-                fraud_type=fraud_type,
-                input_data=row.to_dict()
-            )
-
-            for model_name in available_models:
-                service = FraudService(fraud_type, model_name=model_name)
-                prediction_result = service.predict(pd.DataFrame([row]))
-
-                if isinstance(prediction_result, tuple):
-                    df_with_results = prediction_result[1]
-                else:
-                    df_with_results = prediction_result
-
-                pred_row = df_with_results.iloc[0]
-                pred_value = bool(pred_row["fraud_prediction"])
-                prob_value = float(pred_row["fraud_probability"])
-
-                # Add to API response
-                record_dict[model_name] = pred_value
-                record_dict[f"{model_name}_probability"] = prob_value
-
-                # Add to DB row
-                setattr(fraud_prediction, model_name, pred_value)
-                setattr(fraud_prediction, f"{model_name}_probability", prob_value)
-
-            records.append(fraud_prediction)
-            results.append(record_dict)
-
-        FraudPrediction.objects.bulk_create(records)
+        for chunk_results in chunks:
+            results.extend(chunk_results)
 
         return Response({
             "fraud_type": fraud_type,
@@ -102,6 +98,7 @@ class FraudDetectionBatchView(APIView):
     
 class FraudDetectionUploadView(APIView):
     parser_classes = [MultiPartParser, FormParser]
+    renderer_classes = RESULT_RENDERER_CLASSES
 
     def post(self, request):
         """
@@ -110,186 +107,278 @@ class FraudDetectionUploadView(APIView):
         - Runs predictions using RandomForest, Logistic Regression, XGBoost
         - Saves results in DB
         - Returns results grouped per record with transaction IDs and overall flag
+        - ?stream=1: NDJSON, one result per line, written as each chunk is saved
         """
         fraud_type = request.data.get("fraud_type")
-        file_obj = request.FILES['file']
-        df = pd.read_csv(file_obj)
+        merchant_name_from_request = request.data.get("merchant_name", None)
 
-        df = fe.engineer(df)
+        # Stream the upload: score and save one chunk at a time
+        chunks = process_upload(request.FILES['file'], fraud_type, merchant_name_from_request)
+        if wants_stream(request):
+            return ndjson_response(chunks)
 
-        merchant_name_from_request = request.data.get("merchant_name", None)
-        available_models = ["random_forest", "log_reg", "xgboost"]
+        responses = []
+        for chunk_responses in chunks:
+            responses.extend(chunk_responses)
 
-        records, responses = [], []
-        next_txn_number = get_next_transaction_number()
+        return Response({
+            "fraud_type": fraud_type,
+            "merchant_name": merchant_name_from_request,
+            "total_records": len(responses),
+            "results": responses
+        })
+    
+class FraudScoreView(APIView):
+    parser_classes = [JSONParser]
+    renderer_classes = RESULT_RENDERER_CLASSES
 
-        for _, row in df.iterrows():
-            txn_id = f"txn{next_txn_number}"
-            next_txn_number += 1
+    def post(self, request, fraud_type):
+        """
+        POST API:
+        - JSON body: one transaction object or an array of up to SCORE_MAX_ROWS
+        - Fields are mapped straight into the fitted feature layout (no CSV/DataFrame)
+        - Returns every model's status and probability; nothing is saved
+        """
+        payload = request.data
+        single = isinstance(payload, dict)
+        records = [payload] if single else payload
+        if not isinstance(records, list) or not records or not all(isinstance(r, dict) for r in records):
+            return Response({"error": "Body must be a JSON object or a non-empty array of objects"}, status=400)
+        if len(records) > SCORE_MAX_ROWS:
+            return Response({"error": f"At most {SCORE_MAX_ROWS} records per request"}, status=400)
+
+        try:
+            results = score_records(fraud_type, records)
+        except FileNotFoundError:
+            return Response({"error": f"Unknown fraud_type: {fraud_type}"}, status=404)
+        except (TypeError, ValueError) as exc:
+            return Response({"error": str(exc)}, status=400)
+
+        if single:
+            return Response(results[0])
+        return Response({
+            "fraud_type": fraud_type,
+            "total_records": len(results),
+            "results": results
+        })
 
-            clean_input_data = clean_for_json(row.to_dict())
+class ScoringJobCreateView(APIView):
+    parser_classes = [MultiPartParser, FormParser]
 
-            # One DB row per record (with all models attached)
-            fraud_prediction = FraudPrediction(
-                fraud_type=fraud_type,
-                transaction_id=txn_id,
-                input_data=clean_input_data,
-                merchant_name=merchant_name_from_request or row.get("merchant_name"),
-            )
+    def post(self, request):
+        """
+        POST API:
+        - Upload CSV file (same fields as predict-upload/)
+        - Stores the file and queues it for background scoring
+        - Returns the job id immediately
+        """
+        job = submit_job(
+            request.FILES['file'],
+            request.data.get("fraud_type"),
+            request.data.get("merchant_name", None),
+        )
+        return Response(ScoringJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
 
-            response_record = {
-                "transaction_id": txn_id,
-                "merchant_name": fraud_prediction.merchant_name,
-                "fraud_type": fraud_type,
-            }
+class ScoringJobDetailView(APIView):
+    """
+    GET API:
+    - Returns status and progress (rows done / total) of a scoring job
+    """
 
-            if fraud_type == "fake_review":
-                response_record["text"] = row.get("text_", None)
-                fraud_prediction.captured_text = row.get("text_", None)
-            elif fraud_type == "payment":
-                response_record["text"] = row.get("Product Category", None)
-                fraud_prediction.captured_text = row.get("Product Category", None)
-            elif fraud_type == "merchant":
-                response_record["text"] = row.get("Issuer organization", None)
-                fraud_prediction.captured_text = row.get("Issuer organization", None)
-            elif fraud_type == "chargeback":
-                response_record["text"] = row.get("Card Number", None)
-                fraud_prediction.captured_text = row.get("Card Number", None)
-
-            # predictions for each model
-            for model_name in available_models:
-                service = FraudService(fraud_type, model_name=model_name)
-                _, df_pred = service.predict(pd.DataFrame([row]))
-                pred_row = df_pred.iloc[0]
-
-                pred_value = bool(pred_row["fraud_prediction"])
-                prob_value = float(pred_row["fraud_probability"])
-
-                # Save to response
-                response_record[model_name] = {
-                    "status": pred_value,
-                    "probability": prob_value
-                }
-
-                # Save to DB row
-                setattr(fraud_prediction, model_name, pred_value)
-                setattr(fraud_prediction, f"{model_name}_probability", prob_value)
-
-                # RandomForest as base
-                if model_name == "random_forest":
-                    fraud_prediction.status = pred_value
-                    response_record["flag"] = pred_value
-
-            records.append(fraud_prediction)
-            responses.append(response_record)
-
-        # Bulk save
-        FraudPrediction.objects.bulk_create(records)
-
-        # Duplicate objects for temp table
-        temp_records = [
-            FraudPredictionTemp(
-                fraud_type=r.fraud_type,
-                input_data=r.input_data,
-                transaction_id=r.transaction_id,
-                merchant_name=r.merchant_name,
-                captured_text=r.captured_text,
-                status=r.status,
-                random_forest=r.random_forest,
-                random_forest_probability=r.random_forest_probability,
-                log_reg=r.log_reg,
-                log_reg_probability=r.log_reg_probability,
-                xgboost=r.xgboost,
-                xgboost_probability=r.xgboost_probability,
-            )
-            for r in records
-        ]
+    def get(self, request, job_id):
+        job = check_orphaned(get_object_or_404(ScoringJob, pk=job_id))
+        return Response(ScoringJobSerializer(job).data)
+
+class ScoringJobResultsView(APIView):
+    """
+    GET API:
+    - Returns a page of a job's result records (?cursor=<next_cursor>&limit=500);
+      the cursor is a byte position in the job's result file
+    """
+    renderer_classes = RESULT_RENDERER_CLASSES
+    DEFAULT_LIMIT = 500
+    MAX_LIMIT = 5000
+
+    def get(self, request, job_id):
+        job = check_orphaned(get_object_or_404(ScoringJob, pk=job_id))
+        try:
+            cursor = max(int(request.query_params.get("cursor", 0)), 0)
+            limit = min(max(int(request.query_params.get("limit", self.DEFAULT_LIMIT)), 1), self.MAX_LIMIT)
+        except ValueError:
+            return Response({"error": "cursor and limit must be integers"}, status=400)
+
+        try:
+            results, next_cursor, more_written = read_results(job, cursor, limit)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=400)
+        has_more = more_written or job.status in ("QUEUED", "RUNNING")
+
+        return Response({
+            "job_id": str(job.id),
+            "status": job.status,
+            "fraud_type": job.fraud_type,
+            "merchant_name": job.merchant_name,
+            "cursor": cursor,
+            "next_cursor": next_cursor if has_more else None,
+            "results": results,
+        })
+
+class FraudPredictionDetailView(APIView):
+    """
+    GET API:
+    - Returns one stored prediction with its raw input row (input_data),
+      which is only loaded here, from the prediction's input batch
+    """
 
-        FraudPredictionTemp.objects.bulk_create(temp_records)
+    def get(self, request, pk):
+        prediction = get_object_or_404(FraudPrediction.objects.select_related("input_batch"), pk=pk)
+        return Response(FraudPredictionSerializer(prediction).data)
 
 
+class ArchivedPredictionsView(APIView):
+    """
+    GET API:
+    - Returns archived predictions of one fraud type from the Parquet archive,
+      paged by id: ?date_from=YYYY-MM-DD&date_to=YYYY-MM-DD&cursor=<next_cursor>&limit=100
+    - Optional filters: merchant, status (true/false)
+    """
+    renderer_classes = RESULT_RENDERER_CLASSES
+    DEFAULT_LIMIT = 100
+    MAX_LIMIT = 1000
+
+    def get(self, request, fraud_type):
+        params = request.query_params
+        try:
+            cursor = int(params.get("cursor", 0))
+            limit = min(max(int(params.get("limit", self.DEFAULT_LIMIT)), 1), self.MAX_LIMIT)
+        except ValueError:
+            return Response({"error": "cursor and limit must be integers"}, status=400)
+
+        dates = {}
+        for name in ("date_from", "date_to"):
+            if params.get(name):
+                try:
+                    dates[name] = parse_date(params[name])
+                except ValueError:
+                    dates[name] = None
+                if dates[name] is None:
+                    return Response({"error": f"{name} must be an ISO date"}, status=400)
+
+        status_param = params.get("status", "").lower()
+        if status_param not in ("", "true", "false"):
+            return Response({"error": "status must be true or false"}, status=400)
+
+        try:
+            results, next_cursor = read_archived(
+                fraud_type,
+                cursor=cursor,
+                limit=limit,
+                merchant_name=params.get("merchant") or None,
+                status={"true": True, "false": False}.get(status_param),
+                **dates,
+            )
+        except ArchiveUnavailable as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
         return Response({
             "fraud_type": fraud_type,
-            "merchant_name": merchant_name_from_request,
-            "total_records": len(records),
-            "results": responses
+            "next_cursor": next_cursor,
+            "results": results,
         })
-    
+
+
 class FraudPredictionTempClearView(APIView):
     """
     POST API:
-    - Clears all data from fraud_predictions_temp table
+    - Clears the current upload session by starting a new one
+      (a single insert; the predictions themselves are kept)
     """
 
     def post(self, request):
-        deleted_count, _ = FraudPredictionTemp.objects.all().delete()
+        previous_id = PredictionSession.current_id()
+        session = PredictionSession.objects.create()
         return Response(
-            {"message": f"Deleted {deleted_count} records from fraud_predictions_temp"},
+            {
+                "message": f"Cleared upload session {previous_id}",
+                "session_id": session.id,
+            },
             status=status.HTTP_200_OK
         )
 
 class FraudPredictionTempSummaryView(APIView):
     """
     GET API:
-    - Returns summary for the unique fraud_type + merchant_name in fraud_predictions_temp
+    - Returns summary for the unique fraud_type + merchant_name in the current upload session
+    - Transactions are paged by id: ?cursor=<next_cursor>&limit=500
     """
+    DEFAULT_LIMIT = 500
+    MAX_LIMIT = 5000
 
     def get(self, request):
-        records = FraudPredictionTemp.objects.all()
-
-        if not records.exists():
+        try:
+            cursor = int(request.query_params.get("cursor", 0))
+            limit = min(max(int(request.query_params.get("limit", self.DEFAULT_LIMIT)), 1), self.MAX_LIMIT)
+        except ValueError:
+            return Response({"error": "cursor and limit must be integers"}, status=400)
+
+        records = FraudPrediction.objects.filter(session_id=PredictionSession.current_id())
+
+        # Counts (one conditional aggregate)
+        totals = records.aggregate(
+            total=Count("id"),
+            fraud=Count("id", filter=Q(status=True)),
+            non_fraud=Count("id", filter=Q(status=False)),
+        )
+        total_count = totals["total"]
+        if not total_count:
             return Response(
-                {"message": "No records found in fraud_predictions_temp"},
+                {"message": "No records found in the current upload session"},
                 status=status.HTTP_200_OK
             )
 
-        fraud_type = records.first().fraud_type
-        merchant_name = records.first().merchant_name
-
-        # Counts
-        total_count = records.count()
-        fraud_count = records.filter(status=True).count()
-        non_fraud_count = records.filter(status=False).count()
+        first = records.order_by("id").values("fraud_type", "merchant_name").first()
+        fraud_count = totals["fraud"]
+        non_fraud_count = totals["non_fraud"]
         fraud_percentage = round((fraud_count / total_count) * 100, 2) if total_count > 0 else 0
 
-        # Transactions list
+        # Transactions page (keyset on id, one row extra to detect more)
+        page = list(
+            records.filter(id__gt=cursor)
+            .order_by("id")
+            .values("id", "transaction_id", "captured_text", "status")[:limit + 1]
+        )
+        has_more = len(page) > limit
+        page = page[:limit]
         transactions = [
             {
-                "transaction_id": r.transaction_id,
-                "captured_text": r.captured_text,
-                "status": "Fraud" if r.status else "Non-fraud"
+                "transaction_id": r["transaction_id"],
+                "captured_text": r["captured_text"],
+                "status": "Fraud" if r["status"] else "Non-fraud"
             }
-            for r in records
+            for r in page
         ]
 
         response_data = {
-            "fraud_type": fraud_type,
-            "merchant_name": merchant_name,
+            "fraud_type": first["fraud_type"],
+            "merchant_name": first["merchant_name"],
             "total_transactions": total_count,
             "total_fraud": fraud_count,
             "total_non_fraud": non_fraud_count,
             "fraud_percentage": fraud_percentage,
             "transactions": transactions,
+            "next_cursor": page[-1]["id"] if has_more else None,
         }
 
         return Response(response_data, status=status.HTTP_200_OK)
     
 class FraudByCapturedTextView(APIView):
     """
-    Returns fraud vs non-fraud counts grouped by captured_text (category).
+    Returns fraud vs non-fraud counts grouped by captured_text (category)
+    for the current upload session.
     """
 
     def get(self, request):
-        data = (
-            FraudPredictionTemp.objects
-            .values("captured_text")
-            .annotate(
-                total=Count("id"),
-                fraud=Count("id", filter=Q(status=True)),
-                non_fraud=Count("id", filter=Q(status=False))
-            )
-            .order_by("-total")
-        )
+        data = captured_text_summary(PredictionSession.current_id())
         return Response(list(data))
     
 class MerchantFraudSummaryView(APIView):
@@ -303,15 +392,9 @@ class MerchantFraudSummaryView(APIView):
         if not merchant:
             return Response({"error": "merchant query parameter is required"}, status=400)
 
-        data = (
-            FraudPrediction.objects
-            .filter(merchant_name=merchant)
-            .values("fraud_type")
-            .annotate(
-                total_transactions=Count("id"),
-                fraudulent=Count("id", filter=Q(status=True)),
-                non_fraudulent=Count("id", filter=Q(status=False))
-            )
+        data = cached_aggregate(
+            f"merchant-fraud-summary:{merchant}", [merchant_scope(merchant)],
+            lambda: list(merchant_fraud_summary(merchant)),
         )
 
         fraud_summary = []
@@ -345,4 +428,20 @@ class MerchantFraudSummaryView(APIView):
             "totalTransactions": total_transactions,
             "totalFraudTransactions": total_fraudulent,
             "totalNonFraudTransaction": total_non_fraudulent
-        })
\ No newline at end of file
+        })
+
+class ServiceMetricsView(APIView):
+    """
+    GET API:
+    - Returns in-process serving counters (model cache hits/misses,
+      prediction cache hit rate, real-time coalescer queue depth and batch
+      sizes per fraud type, write-behind queue lag)
+    """
+
+    def get(self, request):
+        return Response({
+            "model_cache": cache_stats(),
+            "prediction_cache": prediction_cache_stats(),
+            "coalescer": coalescer_stats(),
+            "write_behind": write_behind_stats(),
+        })
@@ -164,3 +164,76 @@ SIMPLE_JWT = {
     "BLACKLIST_AFTER_ROTATION": False,
     "AUTH_HEADER_TYPES": ("Bearer",),
 }
+
+# Fraud model serving
+# Memory budget for fitted pipelines cached per process (bytes, measured on disk).
+FRAUD_MODEL_CACHE_MAX_BYTES = 2 * 1024 ** 3
+# Uploaded CSVs are read, scored and saved in chunks of this many rows.
+FRAUD_UPLOAD_CHUNK_ROWS = 5000
+FRAUD_BULK_CREATE_BATCH_SIZE = 1000
+
+# Background scoring jobs: uploads and NDJSON results are kept under FRAUD_JOB_DIR
+# and scored by a local process pool of FRAUD_JOB_WORKERS processes.
+FRAUD_JOB_DIR = BASE_DIR / "var" / "jobs"
+FRAUD_JOB_WORKERS = 2
+
+# Load every model artifact when the WSGI app is imported. Combined with a
+# pre-forking server that imports the app in its master (gunicorn.conf.py sets
+# preload_app), all workers share the model pages copy-on-write.
+FRAUD_PRELOAD_MODELS = True
+
+# Batches of up to this many rows are scored with the flat tree arrays exported
+# next to random_forest/xgboost (<model>.trees.npz); 0 disables them.
+FRAUD_COMPILED_TREES_MAX_ROWS = 64
+
+# Largest JSON array accepted by POST /api/score/<fraud_type>/
+FRAUD_SCORE_MAX_ROWS = 100
+
+# Concurrent real-time score requests arriving within FRAUD_COALESCE_WINDOW_MS
+# are scored as one batch of at most FRAUD_COALESCE_MAX_ROWS rows (0 disables).
+# Opt-in: every request then waits up to the window for others to join its
+# batch, so lone requests gain latency. Only worth it when many requests arrive
+# concurrently; a few milliseconds (e.g. 2) is enough to batch them.
+FRAUD_COALESCE_WINDOW_MS = 0
+FRAUD_COALESCE_MAX_ROWS = 64
+
+# Per-row prediction cache keyed by a hash of the preprocessor's input columns
+# and the model artifact digest; one entry per row and model (0 disables it).
+FRAUD_PREDICTION_CACHE_MAX_ENTRIES = 100_000
+FRAUD_PREDICTION_CACHE_TTL_SECONDS = 3600
+
+# Predictions older than FRAUD_RETENTION_DAYS whole days are moved by
+# `manage.py archive_predictions [--loop]` to Parquet files under
+# FRAUD_ARCHIVE_DIR/fraud_type=<type>/date=<day>/ (needs pyarrow), deleting
+# FRAUD_ARCHIVE_BATCH_ROWS rows per transaction. Read back via /api/archive/<type>/.
+FRAUD_ARCHIVE_DIR = BASE_DIR / "var" / "archive"
+FRAUD_RETENTION_DAYS = 90
+FRAUD_ARCHIVE_BATCH_ROWS = 5000
+
+# Dashboard aggregates (fraud-summary, merchant-fraud, merchant-fraud-summary)
+# are cached until the upload writes bump their version. The file backend is
+# shared by the web workers and the scoring job processes on one host.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "dashboard": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": BASE_DIR / "var" / "cache" / "dashboard",
+        "TIMEOUT": 600,
+        "OPTIONS": {"MAX_ENTRIES": 10_000},
+    },
+}
+FRAUD_DASHBOARD_CACHE = "dashboard"
+
+# Write-behind persistence: when enabled, scored upload chunks are committed to
+# a local SQLite journal (FRAUD_WRITE_BEHIND_PATH) and the response returns
+# without waiting for MySQL; a drainer thread per process writes them in
+# transactions of up to FRAUD_WRITE_BEHIND_BATCH_ROWS rows, retrying with
+# backoff (entries failing FRAUD_WRITE_BEHIND_MAX_ATTEMPTS times are parked).
+# Queue lag is reported by /api/metrics/.
+FRAUD_WRITE_BEHIND = False
+FRAUD_WRITE_BEHIND_PATH = BASE_DIR / "var" / "queue" / "predictions.sqlite3"
+FRAUD_WRITE_BEHIND_BATCH_ROWS = 20000
+FRAUD_WRITE_BEHIND_LEASE_SECONDS = 300
+FRAUD_WRITE_BEHIND_MAX_ATTEMPTS = 10
@@ -9,8 +9,15 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'fraud_detection_api.settings')
 
 application = get_wsgi_application()
+
+# Load all models before the server forks its workers (gunicorn --preload),
+# so the workers share one copy of the model memory.
+if getattr(settings, "FRAUD_PRELOAD_MODELS", False):
+    from detection.services.preload import preload_for_fork
+    preload_for_fork()
@@ -0,0 +1,17 @@
+# gunicorn -c gunicorn.conf.py
+import multiprocessing
+
+wsgi_app = "fraud_detection_api.wsgi:application"
+bind = "0.0.0.0:8000"
+
+# Import the app (and preload the fraud models) once in the master, then fork:
+# model memory is shared copy-on-write instead of duplicated per worker.
+preload_app = True
+workers = multiprocessing.cpu_count()
+timeout = 120
+
+
+def post_fork(server, worker):
+    # Threads do not survive the fork: start the write-behind drainer per worker
+    from detection.services.write_behind import start_drainer
+    start_drainer()
@@ -1,7 +1,7 @@
 import os, argparse, logging
 from src.utils import setup_logging, seed_everything, ensure_dirs
 from src import preprocess as pp, features as fe
-from src.train import split_data, build_models, save_model
+from src.train import split_data, build_models, save_model, save_fused_ensemble
 from src.evaluate import evaluate_and_report
 from src.ensemble import run_ensembles
 
@@ -56,6 +56,7 @@ def main():
         pipe.fit(X_train, y_train)
         fitted[name] = pipe
         save_model(pipe, models_dir, name)
+    save_fused_ensemble(fitted, models_dir)
 
     # Evaluate
     evaluate_and_report(fitted, X_test, y_test, reports_dir)
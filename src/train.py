@@ -1,4 +1,5 @@
-import os, logging, joblib
+import os, json, logging, hashlib, joblib
+import numpy as np
 from sklearn.model_selection import train_test_split
 from sklearn.pipeline import Pipeline
 from sklearn.linear_model import LogisticRegression
@@ -30,6 +31,113 @@ def build_models(preprocessor):
                  for name, model in models.items()}
     return pipelines
 
+# ==============================
+# Export tree ensembles as flat arrays
+# ==============================
+def _export_forest(forest):
+    """
+    Concatenate every fitted tree into contiguous node arrays.
+    Leaf values hold the per-tree class probabilities (value / value.sum()),
+    exactly what DecisionTreeClassifier.predict_proba returns for a leaf.
+    """
+    feature, threshold, left, right, missing_left, value, roots = [], [], [], [], [], [], []
+    offset = 0
+    for est in forest.estimators_:
+        tree = est.tree_
+        is_leaf = tree.children_left == -1
+        nodes = np.arange(tree.node_count) + offset
+        feature.append(np.where(is_leaf, 0, tree.feature))
+        threshold.append(tree.threshold)
+        left.append(np.where(is_leaf, nodes, tree.children_left + offset))
+        right.append(np.where(is_leaf, nodes, tree.children_right + offset))
+        missing_left.append(
+            getattr(tree, "missing_go_to_left", np.zeros(tree.node_count, dtype=np.uint8)).astype(bool)
+        )
+        proba = tree.value[:, 0, :].copy()
+        normalizer = proba.sum(axis=1, keepdims=True)
+        normalizer[normalizer == 0.0] = 1.0
+        value.append(proba / normalizer)
+        roots.append(offset)
+        offset += tree.node_count
+
+    return {
+        "kind": np.array("random_forest"),
+        "feature": np.concatenate(feature).astype(np.int32),
+        "threshold": np.concatenate(threshold).astype(np.float64),
+        "left": np.concatenate(left).astype(np.int32),
+        "right": np.concatenate(right).astype(np.int32),
+        "missing_left": np.concatenate(missing_left),
+        "value": np.concatenate(value).astype(np.float64),
+        "roots": np.array(roots, dtype=np.int32),
+        "classes": forest.classes_,
+    }
+
+
+def _export_xgboost(model):
+    """
+    Flatten a binary:logistic XGBClassifier from its JSON model dump.
+    XGBoost sends `x < split` left; thresholds are stored as the next float32
+    below the split so the evaluator can use `x <= threshold` for both kinds.
+    """
+    raw = json.loads(bytes(model.get_booster().save_raw("json")))
+    learner = raw["learner"]
+    if learner["objective"]["name"] != "binary:logistic" or learner["gradient_booster"]["name"] != "gbtree":
+        return None
+    if getattr(model, "best_iteration", None) is not None:
+        return None
+
+    feature, threshold, left, right, missing_left, value, roots = [], [], [], [], [], [], []
+    offset = 0
+    for tree in learner["gradient_booster"]["model"]["trees"]:
+        if tree["categories"]:
+            return None
+        children_left = np.array(tree["left_children"], dtype=np.int64)
+        children_right = np.array(tree["right_children"], dtype=np.int64)
+        split = np.array(tree["split_conditions"], dtype=np.float32)
+        is_leaf = children_left == -1
+        nodes = np.arange(len(children_left)) + offset
+        feature.append(np.where(is_leaf, 0, tree["split_indices"]))
+        threshold.append(np.nextafter(split, np.float32(-np.inf)).astype(np.float64))
+        left.append(np.where(is_leaf, nodes, children_left + offset))
+        right.append(np.where(is_leaf, nodes, children_right + offset))
+        missing_left.append(np.array(tree["default_left"], dtype=bool))
+        value.append(np.where(is_leaf, split, np.float32(0.0)))
+        roots.append(offset)
+        offset += len(children_left)
+
+    base_score = np.float32(str(learner["learner_model_param"]["base_score"]).strip("[]"))
+    return {
+        "kind": np.array("xgboost"),
+        "feature": np.concatenate(feature).astype(np.int32),
+        "threshold": np.concatenate(threshold),
+        "left": np.concatenate(left).astype(np.int32),
+        "right": np.concatenate(right).astype(np.int32),
+        "missing_left": np.concatenate(missing_left),
+        "value": np.concatenate(value).astype(np.float32),
+        "roots": np.array(roots, dtype=np.int32),
+        "classes": model.classes_,
+        "base_margin": np.float32(-np.log(np.float32(1.0) / base_score - np.float32(1.0))),
+    }
+
+
+def export_tree_arrays(model):
+    """
+    Return flat node arrays (feature, threshold, children, leaf values) for a
+    fitted RandomForestClassifier or XGBClassifier, or None for other models.
+    """
+    if isinstance(model, RandomForestClassifier):
+        return _export_forest(model)
+    if isinstance(model, XGBClassifier):
+        return _export_xgboost(model)
+    return None
+
+def file_sha256(path: str) -> str:
+    sha = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1024 * 1024), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
 # ==============================
 # Save trained model
 # ==============================
@@ -38,8 +146,35 @@ def save_model(pipe, model_dir: str, name: str):
     path = os.path.join(model_dir, f"{name}.joblib")
     joblib.dump(pipe, path)
     logging.info("Saved model: %s", path)
+
+    # Tree models also get a flat-array export for the serving-side evaluator
+    if hasattr(pipe, "named_steps"):
+        arrays = export_tree_arrays(pipe.named_steps["model"])
+        if arrays is not None:
+            trees_path = os.path.join(model_dir, f"{name}.trees.npz")
+            np.savez(trees_path, **arrays)
+            logging.info("Saved tree arrays: %s", trees_path)
     return path
 
+# ==============================
+# Save fused ensemble artifact
+# ==============================
+def save_fused_ensemble(pipelines: dict, model_dir: str, name: str = "ensemble"):
+    """
+    Save a manifest of the per-model pipeline files (name -> sha256) that
+    share one fitted preprocessor, so serving can transform the input once
+    and score it with all models without storing the estimators twice.
+    The pipelines from build_models share a single preprocessor object;
+    call this after save_model has written each of them.
+    """
+    preprocessors = {id(pipe.named_steps["preprocessor"]) for pipe in pipelines.values()}
+    if len(preprocessors) != 1:
+        raise ValueError("Pipelines do not share a fitted preprocessor; cannot fuse them")
+    manifest = {
+        "models": {n: file_sha256(os.path.join(model_dir, f"{n}.joblib")) for n in pipelines},
+    }
+    return save_model(manifest, model_dir, name)
+
 # ==============================
 # Training entry point
 # ==============================
@@ -75,6 +210,7 @@ def train_all(base_exp_dir="experiments"):
         for name, pipe in pipelines.items():
             pipe.fit(X_train, y_train)
             save_model(pipe, model_dir, name)
+        save_fused_ensemble(pipelines, model_dir)
 
         # Evaluation
         evaluate_and_report(pipelines, X_test, y_test, reports_dir)